@@ -0,0 +1,181 @@
+"""
+End-to-end load benchmark of the integration against the mock Tantron cloud.
+
+Requires `pytest-homeassistant-custom-component` (see `bench/requirements.txt`), run from the repository root:
+```shell
+python -m bench.benchmark --devices 10 100 1000 --change-rate 5 --duration 30
+```
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import statistics
+import sys
+import time
+from typing import TYPE_CHECKING
+
+from aiohttp import ClientSession
+from homeassistant import loader
+from homeassistant.const import EVENT_STATE_CHANGED
+from pytest_homeassistant_custom_component.common import MockConfigEntry, async_test_home_assistant
+
+from custom_components.tantron import cloud as tantron_cloud
+from custom_components.tantron.const import DOMAIN
+from .mock_cloud import HOUSEHOLD_ID, TOKEN
+
+if TYPE_CHECKING:
+    from typing import Any, Dict, List, Optional
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def _percentile(samples: List[float], q: float) -> Optional[float]:
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[min(int(len(ordered) * q), len(ordered) - 1)]
+
+
+class MockCloudProcess:
+    """
+    Runs the mock cloud in a subprocess, so that its CPU time is not counted as the integration's.
+    """
+
+    def __init__(self, devices: int, latency: float, change_rate: float, seed: int):
+        self.args = ['--port', '0', '--devices', str(devices), '--latency', str(latency),
+                     '--change-rate', str(change_rate), '--seed', str(seed)]
+        self.process: Optional[asyncio.subprocess.Process] = None
+        self.url: Optional[str] = None
+
+    async def start(self) -> str:
+        self.process = await asyncio.create_subprocess_exec(
+            sys.executable, '-m', 'bench.mock_cloud', *self.args, stdout=asyncio.subprocess.PIPE
+        )
+        line = (await self.process.stdout.readline()).decode()
+        if ' listening on ' not in line:
+            raise RuntimeError(f'mock cloud failed to start: {line!r}')
+        self.url = line.split(' listening on ', 1)[1].split(' ', 1)[0]
+        return self.url
+
+    async def stats(self) -> Dict[str, Any]:
+        async with ClientSession() as session:
+            async with session.get(self.url + 'mock/stats') as response:
+                return await response.json()
+
+    async def stop(self):
+        if self.process is not None and self.process.returncode is None:
+            self.process.terminate()
+            await self.process.wait()
+
+
+async def run_benchmark(devices: int,
+                        change_rate: float,
+                        latency: float,
+                        duration: float,
+                        commands: int) -> Dict[str, Optional[float]]:
+    cloud = MockCloudProcess(devices=devices, latency=latency, change_rate=change_rate, seed=devices)
+    tantron_cloud.BASE_URL = await cloud.start()
+    result: Dict[str, Optional[float]] = {'devices': devices}
+
+    try:
+        async with async_test_home_assistant() as hass:
+            # the test instance disables custom integrations by default
+            hass.data.pop(loader.DATA_CUSTOM_COMPONENTS, None)
+
+            entry = MockConfigEntry(domain=DOMAIN, unique_id=HOUSEHOLD_ID, data={
+                'phone': '10000000000',
+                'password': tantron_cloud.TantronCloud.hash_password('password'),
+                'token': TOKEN,
+                'household': HOUSEHOLD_ID
+            })
+            entry.add_to_hass(hass)
+
+            started_at = time.monotonic()
+            assert await hass.config_entries.async_setup(entry.entry_id)
+            await hass.async_block_till_done()
+            result['setup_s'] = time.monotonic() - started_at
+
+            # steady state with random changes in the household
+            state_writes = 0
+
+            def _count_state_write(_event):
+                nonlocal state_writes
+                state_writes += 1
+
+            cancel = hass.bus.async_listen(EVENT_STATE_CHANGED, _count_state_write)
+            stats_before = await cloud.stats()
+            cpu_before = time.process_time()
+            await asyncio.sleep(duration)
+            cpu = time.process_time() - cpu_before
+            stats_after = await cloud.stats()
+            polls = stats_after['state_requests'] - stats_before['state_requests']
+            cancel()
+
+            result['changes_per_s'] = (stats_after['changes'] - stats_before['changes']) / duration
+            result['state_writes_per_s'] = state_writes / duration
+            result['polls_per_s'] = polls / duration
+            result['cpu_ms_per_poll'] = cpu / polls * 1000 if polls else None
+            result['cpu_percent'] = cpu / duration * 100
+
+            # command latency of single lights
+            lights = hass.states.async_entity_ids('light')
+            latencies = []
+            for entity_id in lights[:commands]:
+                started_at = time.monotonic()
+                await hass.services.async_call('light', 'turn_on', {'entity_id': entity_id}, blocking=True)
+                latencies.append(time.monotonic() - started_at)
+            result['command_p50_ms'] = (statistics.median(latencies) * 1000) if latencies else None
+            result['command_p95_ms'] = (_percentile(latencies, 0.95) or 0) * 1000 if latencies else None
+
+            # all lights off at once
+            puts_before = (await cloud.stats())['put_requests']
+            started_at = time.monotonic()
+            if lights:
+                await hass.services.async_call('light', 'turn_off', {'entity_id': lights}, blocking=True)
+            result['all_off_ms'] = (time.monotonic() - started_at) * 1000
+            result['all_off_puts'] = (await cloud.stats())['put_requests'] - puts_before
+
+            assert await hass.config_entries.async_unload(entry.entry_id)
+            await hass.async_block_till_done()
+    finally:
+        await cloud.stop()
+
+    return result
+
+
+def _format(value: Optional[float]) -> str:
+    if value is None:
+        return '-'
+    if isinstance(value, int):
+        return str(value)
+    return f'{value:.2f}'
+
+
+async def _main(args: argparse.Namespace):
+    results = []
+    for devices in args.devices:
+        _LOGGER.info('Benchmarking %d devices', devices)
+        results.append(await run_benchmark(devices, args.change_rate, args.latency, args.duration, args.commands))
+
+    columns = list(results[0].keys())
+    widths = [max(len(column), *(len(_format(result.get(column))) for result in results)) for column in columns]
+    print('  '.join(column.rjust(width) for column, width in zip(columns, widths)))
+    for result in results:
+        print('  '.join(_format(result.get(column)).rjust(width) for column, width in zip(columns, widths)))
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--devices', type=int, nargs='+', default=[10, 100, 1000])
+    parser.add_argument('--change-rate', type=float, default=5.0, help='random device changes per second')
+    parser.add_argument('--latency', type=float, default=0.05, help='seconds added to every request')
+    parser.add_argument('--duration', type=float, default=30.0, help='seconds to measure the steady state')
+    parser.add_argument('--commands', type=int, default=20, help='single light commands to measure')
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_main(parse_args()))
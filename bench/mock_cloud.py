@@ -0,0 +1,381 @@
+"""
+A local stand-in for the Tantron cloud, implementing the endpoints used by `TantronCloud`.
+
+Run it standalone to point a development instance at it:
+```shell
+python -m bench.mock_cloud --devices 100 --latency 0.05 --change-rate 2
+```
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import random
+import time
+from typing import TYPE_CHECKING
+
+from aiohttp import web
+
+if TYPE_CHECKING:
+    from typing import Dict, List, Optional, Tuple
+
+_LOGGER = logging.getLogger(__name__)
+
+HOUSEHOLD_ID = 'mock-household'
+GATEWAY_ID = 'mock-gateway'
+TOKEN = 'mock-token'
+CONFIG_VERSION = 1
+
+FLOORS = [{
+    'name': '1F',
+    'areaList': [
+        {'id': 'area-1', 'name': 'Living Room'},
+        {'id': 'area-2', 'name': 'Bedroom'},
+        {'id': 'area-3', 'name': 'Kitchen'}
+    ]
+}]
+
+
+def _function(function_type: str, name: str, addr: str, values: List[str]) -> dict:
+    return {
+        'type': function_type,
+        'name': name,
+        'sendList': [{
+            'dataType': '0',
+            'dataLength': '1',
+            'dataValueList': values,
+            'addr': addr,
+            'protocolType': 'KNX',
+            'sleep': 0
+        }]
+    }
+
+
+# device type -> (icon, function list factory, initial values)
+DEVICE_TEMPLATES = {
+    'light': ('icon_light_01', lambda a: [
+        _function('switch', '开关', f'{a}/0', ['0', '1'])
+    ], {'switch': '0'}),
+    'curtain': ('icon_curtain_01', lambda a: [
+        _function('switch', '开合', f'{a}/0', ['0', '1']),
+        _function('stop', '停止', f'{a}/1', ['1'])
+    ], {'switch': '0'}),
+    'AC': ('icon_ac_01', lambda a: [
+        _function('switch', '开关', f'{a}/0', ['0', '1']),
+        _function('mode', '模式', f'{a}/1', ['1', '2', '3', '4']),
+        _function('speed', '风速', f'{a}/2', ['2', '3', '4', '5']),
+        _function('targetTemp', '设定温度', f'{a}/3', [str(i) for i in range(18, 30)]),
+        _function('tempSensor', '室内温度', f'{a}/4', [])
+    ], {'switch': '0', 'mode': '2', 'speed': '2', 'targetTemp': '26', 'tempSensor': '27'}),
+    'heating': ('icon_heating_01', lambda a: [
+        _function('switch', '开关', f'{a}/0', ['0', '1']),
+        _function('targetTemp', '设定温度', f'{a}/1', [str(i) for i in range(20, 41)])
+    ], {'switch': '0', 'targetTemp': '24'}),
+    'freshAir': ('icon_freshair_01', lambda a: [
+        _function('switch', '开关', f'{a}/0', ['0', '1']),
+        _function('speed', '风速', f'{a}/1', ['1', '2', '3'])
+    ], {'switch': '0', 'speed': '1'}),
+    'envSensor': ('icon_envsensor_01', lambda a: [
+        _function('value', '温度', f'{a}/0', [])
+    ], {'value': '25.0'}),
+    'secuSensor': ('icon_secusensor_02', lambda a: [
+        _function('status', '状态', f'{a}/0', ['0', '1'])
+    ], {'status': '0'})
+}
+
+# lights dominate real households
+DEVICE_TYPE_WEIGHTS = {
+    'light': 10,
+    'curtain': 3,
+    'AC': 2,
+    'heating': 1,
+    'freshAir': 1,
+    'envSensor': 2,
+    'secuSensor': 1
+}
+
+
+class MockTantronCloud:
+    """
+    In-memory Tantron cloud with configurable size and behaviour.
+
+    `latency` is added to every request, `change_rate` is the number of random device changes per second,
+    and `block_timeout` is how long the shadow poll is held when nothing has changed.
+    Device list pages are capped at `max_page_size` devices, whatever page size is requested.
+    """
+
+    def __init__(self,
+                 devices: int = 10,
+                 masters: int = 1,
+                 latency: float = 0.0,
+                 change_rate: float = 0.0,
+                 block_timeout: float = 30.0,
+                 max_page_size: Optional[int] = None,
+                 seed: Optional[int] = None):
+        self.latency = latency
+        self.change_rate = change_rate
+        self.block_timeout = block_timeout
+        self.max_page_size = max_page_size
+        self.coordinates = (39.90, 116.40)  # latitude and longitude of the household
+        self.random = random.Random(seed)
+
+        self.devices: Dict[str, dict] = {}
+        self.values: Dict[str, Dict[str, str]] = {}
+        self.versions: Dict[str, int] = {}
+        self._create_devices(devices, masters)
+
+        self.requests: Dict[str, int] = {}
+        self.state_requests = 0
+        self.put_requests: List[Tuple[float, dict]] = []
+        self._changed = asyncio.Condition()
+        self._runner: Optional[web.AppRunner] = None
+        self._change_task: Optional[asyncio.Task] = None
+        self.url: Optional[str] = None
+
+    def _create_devices(self, count: int, masters: int):
+        types = list(DEVICE_TYPE_WEIGHTS.keys())
+        weights = list(DEVICE_TYPE_WEIGHTS.values())
+        for index in range(count):
+            device_type = self.random.choices(types, weights)[0]
+            icon, functions, values = DEVICE_TEMPLATES[device_type]
+            config_id = str(10000 + index)
+            self.devices[config_id] = {
+                'id': config_id,
+                'masterId': f'master-{index % masters}',
+                'configVersion': CONFIG_VERSION,
+                'type': device_type,
+                'name': f'{device_type} {index}',
+                'area': FLOORS[0]['areaList'][index % len(FLOORS[0]['areaList'])]['id'],
+                'icon': icon,
+                'functionList': functions(f'{index // 256}/{index % 256}'),
+                'functionValues': dict(values)
+            }
+            self.values[config_id] = dict(values)
+            self.versions[config_id] = 1
+
+    async def start(self, host: str = '127.0.0.1', port: int = 0) -> str:
+        app = web.Application(middlewares=[self._middleware])
+        app.add_routes([
+            web.post('/user-service/wei_xin_mini_program/login', self._login),
+            web.get('/user-service/user', self._user),
+            web.get('/user-service/normal/household/list', self._household_list),
+            web.get('/user-service/normal/household/change/household/{id}', self._household),
+            web.get('/user-service/normal/household/detail/{id}', self._household),
+            web.get('/hinge-service/normal/court/household/{id}', self._coordinates),
+            web.get('/common-service/external/weather/{period}', self._weather),
+            web.get('/device-service/normal/gateway', self._gateway),
+            web.get('/device-service/normal/device/location', self._areas),
+            web.get('/device-service/normal/device/list', self._device_list),
+            web.put('/device-service/normal/device/state', self._put_state),
+            web.post('/state-service/shadow/device/state/block', self._get_state),
+            web.get('/mock/stats', self._stats)
+        ])
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        port = self._runner.addresses[0][1]
+        self.url = f'http://{host}:{port}/'
+        if self.change_rate > 0:
+            self._change_task = asyncio.create_task(self._generate_changes())
+        return self.url
+
+    async def stop(self):
+        if self._change_task is not None:
+            self._change_task.cancel()
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+    async def change_device(self, config_id: str, values: Dict[str, str]):
+        self.values[config_id].update(values)
+        self.versions[config_id] += 1
+        async with self._changed:
+            self._changed.notify_all()
+
+    async def _generate_changes(self):
+        config_ids = list(self.devices.keys())
+        while True:
+            await asyncio.sleep(self.random.expovariate(self.change_rate))
+            config_id = self.random.choice(config_ids)
+            function_type, value = next(iter(self.values[config_id].items()))
+            if value in ('0', '1'):
+                value = '1' if value == '0' else '0'
+            else:
+                value = str(round(float(value) + self.random.uniform(-0.5, 0.5), 1))
+            await self.change_device(config_id, {function_type: value})
+
+    @web.middleware
+    async def _middleware(self, request: web.Request, handler):
+        route = request.match_info.route.resource.canonical if request.match_info.route.resource else request.path
+        self.requests[route] = self.requests.get(route, 0) + 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if request.path.startswith('/mock/'):
+            return await handler(request)
+        if not request.path.endswith('/login') and request.headers.get('access_token') != TOKEN:
+            return self._respond(None, code=403, message='token expired')
+        return await handler(request)
+
+    @staticmethod
+    def _respond(data, code: int = 200, message: str = 'success') -> web.Response:
+        return web.json_response({
+            'code': code,
+            'message': message,
+            'data': data
+        })
+
+    async def _login(self, request: web.Request):
+        return self._respond({'accessToken': TOKEN})
+
+    async def _user(self, request: web.Request):
+        return self._respond({'phone': '10000000000'})
+
+    async def _household_list(self, request: web.Request):
+        return self._respond([{
+            'householdId': HOUSEHOLD_ID,
+            'householdName': 'Mock Household',
+            'gatewayBound': True
+        }])
+
+    async def _household(self, request: web.Request):
+        return self._respond({
+            'householdId': HOUSEHOLD_ID,
+            'householdName': 'Mock Household'
+        })
+
+    async def _coordinates(self, request: web.Request):
+        latitude, longitude = self.coordinates
+        return self._respond({'lat': f'{latitude:.2f}', 'lon': f'{longitude:.2f}'})
+
+    async def _weather(self, request: web.Request):
+        period = request.match_info['period']
+        if period == 'now':
+            return self._respond({'expireTime': 1200, 'now': {'temp': '20', 'icon': '100', 'humidity': '40'}})
+        if period == '24hour':
+            return self._respond({'expireTime': 3600, 'hourly': [
+                {'fxTime': f'2026-01-01T{hour:02d}:00+08:00', 'temp': '20', 'icon': '100'} for hour in range(24)
+            ]})
+        return self._respond({'expireTime': 3600, 'daily': [
+            {'fxDate': f'2026-01-{day:02d}', 'tempMax': '25', 'tempMin': '15', 'iconDay': '101'}
+            for day in range(1, 8)
+        ]})
+
+    async def _gateway(self, request: web.Request):
+        return self._respond({
+            'id': GATEWAY_ID,
+            'name': 'Mock Gateway',
+            'model': 'MOCK',
+            'serialNo': '0000',
+            'versionName': '1.0.0',
+            'onlineState': 1
+        })
+
+    async def _areas(self, request: web.Request):
+        return self._respond({'floorList': FLOORS})
+
+    async def _device_list(self, request: web.Request):
+        page_num = int(request.query.get('pageNum', 1))
+        page_size = int(request.query.get('pageSize', 1000))
+        if self.max_page_size:
+            page_size = min(page_size, self.max_page_size)
+        devices = [
+            {**device, 'functionValues': dict(self.values[config_id])}
+            for config_id, device in self.devices.items()
+        ]
+        return self._respond({
+            'total': len(devices),
+            'pageNum': page_num,
+            'pageSize': page_size,
+            'list': devices[(page_num - 1) * page_size:page_num * page_size]
+        })
+
+    async def _put_state(self, request: web.Request):
+        payload = await request.json()
+        self.put_requests.append((time.monotonic(), payload))
+        config_id = str(payload.get('deviceConfigId'))
+        if config_id not in self.devices:
+            return self._respond(None, code=500, message='device not found')
+        await self.change_device(config_id, {
+            command['type']: command['value'] for command in payload.get('cmd', []) if command.get('type')
+        })
+        return self._respond(None)
+
+    def _collect_changes(self, connections: List[dict]) -> List[dict]:
+        result = []
+        for connection in connections:
+            config_id = str(connection.get('deviceConfigId'))
+            if config_id in self.versions and self.versions[config_id] > int(connection.get('version') or 0):
+                result.append({
+                    'deviceConfigId': config_id,
+                    'version': self.versions[config_id],
+                    'function': dict(self.values[config_id])
+                })
+        return result
+
+    async def _get_state(self, request: web.Request):
+        self.state_requests += 1
+        connections = await request.json()
+        deadline = time.monotonic() + self.block_timeout
+        async with self._changed:
+            while not (changes := self._collect_changes(connections)):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    await asyncio.wait_for(self._changed.wait(), remaining)
+                except asyncio.TimeoutError:
+                    break
+        return self._respond(changes)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'state_requests': self.state_requests,
+            'put_requests': len(self.put_requests),
+            'changes': sum(self.versions.values())
+        }
+
+    async def _stats(self, request: web.Request):
+        # counters for a benchmark running the mock in another process, not part of the Tantron api
+        return web.json_response(self.stats())
+
+
+async def _main(args: argparse.Namespace):
+    cloud = MockTantronCloud(
+        devices=args.devices,
+        masters=args.masters,
+        latency=args.latency,
+        change_rate=args.change_rate,
+        block_timeout=args.block_timeout,
+        max_page_size=args.max_page_size,
+        seed=args.seed
+    )
+    url = await cloud.start(args.host, args.port)
+    # the first line is parsed by `bench.benchmark`
+    print(f'Mock Tantron cloud listening on {url} with {len(cloud.devices)} devices, token {TOKEN}', flush=True)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await cloud.stop()
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=9123)
+    parser.add_argument('--devices', type=int, default=10)
+    parser.add_argument('--masters', type=int, default=1)
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds added to every request')
+    parser.add_argument('--change-rate', type=float, default=0.0, help='random device changes per second')
+    parser.add_argument('--block-timeout', type=float, default=30.0, help='seconds the shadow poll is held')
+    parser.add_argument('--max-page-size', type=int, default=None, help='largest device list page served')
+    parser.add_argument('--seed', type=int, default=None, help='seed of the generated devices and changes')
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    try:
+        asyncio.run(_main(parse_args()))
+    except KeyboardInterrupt:
+        pass
@@ -3,33 +3,45 @@ from __future__ import annotations
 import functools
 from typing import TYPE_CHECKING
 
-from homeassistant.exceptions import ConfigEntryAuthFailed, ConfigEntryNotReady
+from homeassistant.helpers import config_validation as cv
 
-from .cloud import TantronCloud
-from .const import PLATFORMS, EVENT_PUT_STATE
-from .coordinator import TantronCoordinator
-from .error import TantronCloudError
+from .cloud import TantronCloud, acquire_clients, async_release_clients
+from .const import DOMAIN, PLATFORMS, EVENT_PUT_STATE
+from .coordinator import TantronCoordinator, create_store
 from .event import handle_put_state
+from .services import async_setup_services
 from .typing import EntryRuntimeData
 
 if TYPE_CHECKING:
     from homeassistant.config_entries import ConfigEntry
     from homeassistant.core import HomeAssistant
+    from homeassistant.helpers.typing import ConfigType
+
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
+
+
+async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
+    async_setup_services(hass)
+    return True
 
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry[EntryRuntimeData]) -> bool:
-    # 1. construct cloud instance and verify authentication
-    _cloud = TantronCloud(hass, entry.data.get('token'), entry.data.get('household'))
-    try:
-        await _cloud.get_household()
-    except TantronCloudError as e:
-        raise ConfigEntryAuthFailed from e
-    except Exception as e:
-        raise ConfigEntryNotReady from e
+    # 1. construct cloud instance, authentication is verified by the coordinator refresh
+    def _save_token(token: str):
+        if token != entry.data.get('token'):
+            hass.config_entries.async_update_entry(entry, data={**entry.data, 'token': token})
+
+    _cloud = TantronCloud(hass, entry.data.get('token'), entry.data.get('household'), entry.data.get('phone'),
+                          entry.data.get('password'), token_callback=_save_token)
+    acquire_clients(hass, _cloud.account, entry.entry_id)
 
-    # 2. construct coordinator instance using the cloud
+    # 2. construct coordinator instance using the cloud, it comes up from the cached topology if available
     _coordinator = TantronCoordinator(hass, entry, _cloud)
-    await _coordinator.async_config_entry_first_refresh()
+    try:
+        await _coordinator.async_config_entry_first_refresh()
+    except Exception:
+        await async_release_clients(hass, _cloud.account, entry.entry_id)
+        raise
 
     # 3. save cloud and coordinator instances and forward setup to platforms
     entry.runtime_data = EntryRuntimeData(cloud=_cloud, coordinator=_coordinator, handlers=[])
@@ -38,17 +50,33 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry[EntryRuntime
     # 4. register custom event handlers
     cancel = hass.bus.async_listen(EVENT_PUT_STATE, functools.partial(handle_put_state, cloud=_cloud))
     entry.runtime_data['handlers'].append(cancel)
+    entry.async_on_unload(entry.add_update_listener(async_update_options))
 
     return True
 
 
+async def async_update_options(hass: HomeAssistant, entry: ConfigEntry[EntryRuntimeData]) -> None:
+    # the entry is also updated when the token is renewed, options are applied without reloading
+    entry.runtime_data['coordinator'].async_update_options()
+
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry[EntryRuntimeData]) -> bool:
     # 1. cancel all event handlers
     for cancel in entry.runtime_data['handlers']:
         cancel()
 
     # 2. unload all platforms
-    return await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
+    if not await hass.config_entries.async_unload_platforms(entry, PLATFORMS):
+        return False
+
+    # 3. stop the shadow poll and close the connection pools if no other entry of the account uses them
+    await entry.runtime_data['coordinator'].async_stop_subscription()
+    await async_release_clients(hass, entry.runtime_data['cloud'].account, entry.entry_id)
+    return True
+
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry[EntryRuntimeData]) -> None:
+    await create_store(hass, entry.entry_id).async_remove()
 
 
 async def async_migrate_entry(hass: HomeAssistant, entry: ConfigEntry[EntryRuntimeData]) -> bool:
@@ -10,6 +10,8 @@ from homeassistant.helpers.device_registry import DeviceInfo
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
 from .coordinator import TantronCoordinator, TantronDeviceEntity
+from .registry import DeviceTypeSpec, async_setup_device_entities
+from .state import SwitchState
 
 if TYPE_CHECKING:
     from typing import Optional, List
@@ -28,10 +30,7 @@ async def async_setup_entry(hass: HomeAssistant,
                             async_add_entities: AddEntitiesCallback):
     coordinator = entry.runtime_data['coordinator']
     entities: List[Entity] = [GatewayOnlineSensor(coordinator)]
-    for device_id, device in coordinator.devices.items():
-        if device['type'] == 'secuSensor' and device['icon'] == 'icon_secusensor_02':
-            entities.append(TantronMotionSensor(coordinator, device))
-    async_add_entities(entities)
+    async_setup_device_entities(entry, async_add_entities, DEVICE_TYPES, entities)
 
 
 class GatewayOnlineSensor(CoordinatorEntity[TantronCoordinator], BinarySensorEntity):
@@ -44,13 +43,19 @@ class GatewayOnlineSensor(CoordinatorEntity[TantronCoordinator], BinarySensorEnt
     def __init__(self, coordinator: TantronCoordinator):
         CoordinatorEntity.__init__(self, coordinator)
         self._state: Optional[dict] = coordinator.gateway
+        self._verified = coordinator.gateway_verified
 
     @callback
     def _handle_coordinator_update(self) -> None:
-        if self.coordinator.gateway != self._state:
+        if self.coordinator.gateway != self._state or self.coordinator.gateway_verified != self._verified:
             self._state = self.coordinator.gateway
+            self._verified = self.coordinator.gateway_verified
             self.async_write_ha_state()
 
+    @property
+    def available(self) -> bool:
+        return super().available and self._verified
+
     @property
     def device_info(self) -> Optional[DeviceInfo]:
         return self.coordinator.gateway_info
@@ -68,12 +73,17 @@ class GatewayOnlineSensor(CoordinatorEntity[TantronCoordinator], BinarySensorEnt
 class TantronMotionSensor(TantronDeviceEntity, BinarySensorEntity):
 
     _attr_device_class = BinarySensorDeviceClass.MOTION
+    _state_type = SwitchState
+    parsed_state: SwitchState
 
-    def __init__(self, coordinator: TantronCoordinator, device: TantronDevice):
-        super().__init__(coordinator, device, 'status')
+    def __init__(self, coordinator: TantronCoordinator, device: TantronDevice, function_name: str = 'status'):
+        super().__init__(coordinator, device, function_name)
 
     @property
     def is_on(self) -> Optional[bool]:
-        if self.function_state is not None:
-            return self.function_state == '1'
-        return None
+        return self.parsed_state.is_on
+
+
+DEVICE_TYPES = [
+    DeviceTypeSpec('secuSensor', TantronMotionSensor, function='status', icon='icon_secusensor_02')
+]
@@ -7,10 +7,12 @@ from homeassistant.components.climate import ClimateEntity, ClimateEntityFeature
     FAN_AUTO, FAN_LOW, FAN_MEDIUM, FAN_HIGH
 from homeassistant.const import UnitOfTemperature, PRECISION_WHOLE
 
-from .coordinator import TantronDeviceEntity
+from .coordinator import TantronAreaEntity, TantronDeviceEntity
+from .registry import DeviceTypeSpec, async_setup_device_entities
+from .state import TantronState, parse_float
 
 if TYPE_CHECKING:
-    from typing import Optional
+    from typing import Dict, List, Optional
     from homeassistant.core import HomeAssistant
     from homeassistant.config_entries import ConfigEntry
     from homeassistant.helpers.entity_platform import AddEntitiesCallback
@@ -19,21 +21,57 @@ if TYPE_CHECKING:
 
 _LOGGER = logging.getLogger(__name__)
 
-
-async def async_setup_entry(hass: HomeAssistant,
-                            entry: ConfigEntry[EntryRuntimeData],
-                            async_add_entities: AddEntitiesCallback):
-    coordinator = entry.runtime_data['coordinator']
-    entities = []
-    for device_id, device in coordinator.devices.items():
-        if device['type'] == 'AC':
-            entities.append(TantronAirConditioner(coordinator, device))
-        elif device['type'] == 'heating':
-            entities.append(TantronHeater(coordinator, device))
-    async_add_entities(entities)
-
-
-class TantronAirConditioner(TantronDeviceEntity, ClimateEntity):
+AC_HVAC_MODE_MAP = {
+    '1': HVACMode.HEAT,
+    '2': HVACMode.COOL,
+    '3': HVACMode.DRY,
+    '4': HVACMode.FAN_ONLY,
+}
+
+AC_FAN_MODE_MAP = {
+    '2': FAN_AUTO,
+    '5': FAN_LOW,
+    '4': FAN_MEDIUM,
+    '3': FAN_HIGH,
+}
+
+
+class AirConditionerState(TantronState):
+    __slots__ = ('hvac_mode', 'fan_mode', 'target_temperature', 'current_temperature')
+
+    def __init__(self, values: Optional[Dict[str, str]]):
+        super().__init__(values)
+        if values is None:
+            self.hvac_mode = None
+        elif values.get('switch') == '0':
+            self.hvac_mode = HVACMode.OFF
+        else:
+            self.hvac_mode = AC_HVAC_MODE_MAP.get(values.get('mode'))
+        values = values or {}
+        self.fan_mode = AC_FAN_MODE_MAP.get(values.get('speed'))
+        self.target_temperature = parse_float(values.get('targetTemp'))
+        self.current_temperature = parse_float(values.get('tempSensor'))
+
+
+class HeaterState(TantronState):
+    __slots__ = ('hvac_mode', 'target_temperature')
+
+    def __init__(self, values: Optional[Dict[str, str]]):
+        super().__init__(values)
+        if values is None:
+            self.hvac_mode = None
+        elif values.get('switch') == '0':
+            self.hvac_mode = HVACMode.OFF
+        else:
+            self.hvac_mode = HVACMode.HEAT
+        self.target_temperature = parse_float((values or {}).get('targetTemp'))
+
+
+class AirConditionerControl:
+    """
+    Features and controls shared by a single air conditioner and the air conditioners of an area,
+    values are sent with `_send_values` of the entity.
+    """
 
     _attr_supported_features = (ClimateEntityFeature.TARGET_TEMPERATURE | ClimateEntityFeature.FAN_MODE |
                                 ClimateEntityFeature.TURN_ON | ClimateEntityFeature.TURN_OFF)
@@ -43,53 +81,8 @@ class TantronAirConditioner(TantronDeviceEntity, ClimateEntity):
     _attr_min_temp = 18
     _attr_target_temperature_step = PRECISION_WHOLE
     _attr_temperature_unit = UnitOfTemperature.CELSIUS
-
-    def __init__(self, coordinator: TantronCoordinator, device: TantronDevice):
-        super().__init__(coordinator, device)
-        self._hvac_mode_map = {
-            '1': HVACMode.HEAT,
-            '2': HVACMode.COOL,
-            '3': HVACMode.DRY,
-            '4': HVACMode.FAN_ONLY,
-        }
-        self._fan_mode_map = {
-            '2': FAN_AUTO,
-            '5': FAN_LOW,
-            '4': FAN_MEDIUM,
-            '3': FAN_HIGH,
-        }
-
-    @property
-    def hvac_mode(self) -> Optional[HVACMode]:
-        if self.function_state is None:
-            return None
-        if self.function_state.get('switch') == '0':
-            return HVACMode.OFF
-        return self._hvac_mode_map.get(self.function_state.get('mode'))
-
-    @property
-    def target_temperature(self) -> Optional[float]:
-        if self.function_state is not None and 'targetTemp' in self.function_state:
-            try:
-                return float(self.function_state['targetTemp'])
-            except ValueError:
-                pass
-        return None
-
-    @property
-    def fan_mode(self) -> Optional[str]:
-        if self.function_state is not None and 'speed' in self.function_state:
-            return self._fan_mode_map.get(self.function_state['speed'])
-        return None
-
-    @property
-    def current_temperature(self) -> Optional[float]:
-        if self.function_state is not None and 'tempSensor' in self.function_state:
-            try:
-                return float(self.function_state['tempSensor'])
-            except ValueError:
-                pass
-        return None
+    _hvac_mode_map = AC_HVAC_MODE_MAP
+    _fan_mode_map = AC_FAN_MODE_MAP
 
     async def async_turn_on(self) -> None:
         await self._send_values({
@@ -131,6 +124,34 @@ class TantronAirConditioner(TantronDeviceEntity, ClimateEntity):
             })
 
 
+async def async_setup_entry(hass: HomeAssistant,
+                            entry: ConfigEntry[EntryRuntimeData],
+                            async_add_entities: AddEntitiesCallback):
+    async_setup_device_entities(entry, async_add_entities, DEVICE_TYPES, area_entities=[TantronAreaAirConditioner])
+
+
+class TantronAirConditioner(AirConditionerControl, TantronDeviceEntity, ClimateEntity):
+
+    _state_type = AirConditionerState
+    parsed_state: AirConditionerState
+
+    @property
+    def hvac_mode(self) -> Optional[HVACMode]:
+        return self.parsed_state.hvac_mode
+
+    @property
+    def target_temperature(self) -> Optional[float]:
+        return self.parsed_state.target_temperature
+
+    @property
+    def fan_mode(self) -> Optional[str]:
+        return self.parsed_state.fan_mode
+
+    @property
+    def current_temperature(self) -> Optional[float]:
+        return self.parsed_state.current_temperature
+
+
 class TantronHeater(TantronDeviceEntity, ClimateEntity):
 
     _attr_supported_features = (ClimateEntityFeature.TARGET_TEMPERATURE | ClimateEntityFeature.TURN_ON |
@@ -140,26 +161,19 @@ class TantronHeater(TantronDeviceEntity, ClimateEntity):
     _attr_min_temp = 20
     _attr_target_temperature_step = PRECISION_WHOLE
     _attr_temperature_unit = UnitOfTemperature.CELSIUS
+    _state_type = HeaterState
+    parsed_state: HeaterState
 
     def __init__(self, coordinator: TantronCoordinator, device: TantronDevice):
         super().__init__(coordinator, device)
 
     @property
     def hvac_mode(self) -> Optional[HVACMode]:
-        if self.function_state is None:
-            return None
-        if self.function_state.get('switch') == '0':
-            return HVACMode.OFF
-        return HVACMode.HEAT
+        return self.parsed_state.hvac_mode
 
     @property
     def target_temperature(self) -> Optional[float]:
-        if self.function_state is not None and 'targetTemp' in self.function_state:
-            try:
-                return float(self.function_state['targetTemp'])
-            except ValueError:
-                pass
-        return None
+        return self.parsed_state.target_temperature
 
     async def async_turn_on(self) -> None:
         await self._send_values({
@@ -181,3 +195,47 @@ class TantronHeater(TantronDeviceEntity, ClimateEntity):
             await self._send_values({
                 'targetTemp': str(target_temp)
             })
+
+
+class TantronAreaAirConditioner(AirConditionerControl, TantronAreaEntity, ClimateEntity):
+    """
+    Air conditioners of an area, showing the mode and settings of the first one that is on.
+    """
+
+    _attr_translation_key = 'area_air_conditioner'
+    _device_types = ('AC',)
+    _state_type = AirConditionerState
+    member_states: List[AirConditionerState]
+
+    @property
+    def leading_state(self) -> Optional[AirConditionerState]:
+        states = self.available_states
+        return next((state for state in states if state.hvac_mode not in (None, HVACMode.OFF)),
+                    states[0] if states else None)
+
+    @property
+    def hvac_mode(self) -> Optional[HVACMode]:
+        state = self.leading_state
+        return state.hvac_mode if state is not None else None
+
+    @property
+    def target_temperature(self) -> Optional[float]:
+        state = self.leading_state
+        return state.target_temperature if state is not None else None
+
+    @property
+    def fan_mode(self) -> Optional[str]:
+        state = self.leading_state
+        return state.fan_mode if state is not None else None
+
+    @property
+    def current_temperature(self) -> Optional[float]:
+        temperatures = [state.current_temperature for state in self.available_states
+                        if state.current_temperature is not None]
+        return sum(temperatures) / len(temperatures) if temperatures else None
+
+
+DEVICE_TYPES = [
+    DeviceTypeSpec('AC', TantronAirConditioner),
+    DeviceTypeSpec('heating', TantronHeater)
+]
@@ -1,18 +1,33 @@
 from __future__ import annotations
 
+import asyncio
+import base64
+import functools
+import importlib.util
 import logging
+import math
+import time
 from http import HTTPStatus
 from typing import TYPE_CHECKING
 from hashlib import sha256
 
-from homeassistant.helpers.httpx_client import create_async_httpx_client
+from httpx import AsyncClient, Limits, Timeout
 
+from homeassistant.const import EVENT_HOMEASSISTANT_CLOSE
+from homeassistant.core import callback
+from homeassistant.util.json import json_loads
+from homeassistant.util.ssl import client_context
+
+from .const import DOMAIN
 from .error import TantronAuthenticationError, TantronConnectionError, TantronCloudError
+from .stats import TantronCloudStats, instrumented
 
 if TYPE_CHECKING:
-    from typing import Optional, Dict, List, Tuple
-    from homeassistant.core import HomeAssistant
-    from httpx import AsyncClient, Response
+    from typing import AsyncIterator, Awaitable, Callable, Optional, Dict, List, Set, Tuple, TypeVar
+    from homeassistant.core import Event, HomeAssistant
+    from httpx import Response
+
+    T = TypeVar('T')
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -20,27 +35,190 @@ BASE_URL = 'https://smart.i-ttg.net/'
 HEADER_TOKEN = 'access_token'
 USER_AGENT = 'TantronAssistant/1.1.8 (iPhone; iOS 18.2; Scale/3.00)'
 
-token_cache = {}
+DATA_CLIENTS = f'{DOMAIN}_clients'
+
+# commands and other short requests, never queued behind the long poll
+CONTROL_LIMITS = Limits(max_connections=10, max_keepalive_connections=5, keepalive_expiry=60)
+# blocking shadow polls, one connection per shard of every household of the account
+POLL_MAX_SHARDS = 8  # shards of a single household, so that a few households still poll without waiting
+POLL_LIMITS = Limits(max_connections=4 * POLL_MAX_SHARDS, max_keepalive_connections=4 * POLL_MAX_SHARDS,
+                     keepalive_expiry=120)
+# the shadow holds the request open, but waiting for a free connection must not hang a shard forever
+POLL_TIMEOUT = Timeout(None, pool=30)
+
+# bodies above this size are decoded in the executor, a full device list of a large household is a few megabytes
+JSON_EXECUTOR_THRESHOLD = 64 * 1024  # bytes
+DEVICE_PAGE_SIZE = 200  # devices per page of the device list
+DEVICE_PAGE_CONCURRENCY = 4  # device list pages fetched at the same time
+TOKEN_CACHE_TTL = 12 * 60 * 60  # seconds a cached token is reused by `login` before logging in again
+TOKEN_REFRESH_MARGIN = 5 * 60  # seconds before the expiry of a token to log in again, if the expiry is known
+
+
+class TantronClients:
+    """
+    HTTP clients shared by all cloud instances of an account.
+    Short requests and the blocking shadow poll use separate connection pools.
+    They are closed once the last config entry of the account has released them, see `async_release_clients`.
+    """
+
+    def __init__(self):
+        # HTTP/2 is negotiated with the server and requires the optional `h2` package
+        http2 = importlib.util.find_spec('h2') is not None
+        self.control = self._create_client(CONTROL_LIMITS, http2)
+        self.poll = self._create_client(POLL_LIMITS, http2)
+        # the latest token of the account, shared so that only one login happens at a time
+        self.token: Optional[str] = None
+        self.token_cached_at = 0.0
+        self.login_lock = asyncio.Lock()
+        self.entry_ids: Set[str] = set()  # loaded config entries using the clients
+
+    def get_cached_token(self) -> Optional[str]:
+        if self.token is not None and time.time() - self.token_cached_at < TOKEN_CACHE_TTL:
+            return self.token
+        return None
+
+    def set_cached_token(self, token: Optional[str]):
+        self.token = token
+        self.token_cached_at = time.time()
+
+    @staticmethod
+    def _create_client(limits: Limits, http2: bool) -> AsyncClient:
+        return AsyncClient(
+            base_url=BASE_URL,
+            headers={
+                'User-Agent': USER_AGENT
+            },
+            verify=client_context(),
+            limits=limits,
+            http2=http2
+        )
+
+    async def async_close(self):
+        await self.control.aclose()
+        await self.poll.aclose()
+
+
+@callback
+def get_clients(hass: HomeAssistant, account: Optional[str] = None) -> TantronClients:
+    if DATA_CLIENTS not in hass.data:
+        hass.data[DATA_CLIENTS] = {}
+
+        async def _async_close_clients(_event: Event):
+            for clients in hass.data.pop(DATA_CLIENTS).values():
+                await clients.async_close()
+
+        hass.bus.async_listen_once(EVENT_HOMEASSISTANT_CLOSE, _async_close_clients)
+
+    if account not in hass.data[DATA_CLIENTS]:
+        hass.data[DATA_CLIENTS][account] = TantronClients()
+    return hass.data[DATA_CLIENTS][account]
+
+
+@callback
+def acquire_clients(hass: HomeAssistant, account: Optional[str], entry_id: str) -> TantronClients:
+    clients = get_clients(hass, account)
+    clients.entry_ids.add(entry_id)
+    return clients
+
+
+async def async_release_clients(hass: HomeAssistant, account: Optional[str], entry_id: str):
+    """
+    Closes the clients of the account once no config entry uses them anymore.
+    """
+    clients = hass.data.get(DATA_CLIENTS, {}).get(account)
+    if clients is None:
+        return
+    clients.entry_ids.discard(entry_id)
+    if not clients.entry_ids:
+        del hass.data[DATA_CLIENTS][account]
+        await clients.async_close()
+
+
+def get_token_expiry(token: str) -> Optional[float]:
+    """
+    Returns the expiry timestamp of the token if it is a JWT, `None` otherwise.
+    """
+    parts = token.split('.')
+    if len(parts) != 3:
+        return None
+    try:
+        payload = json_loads(base64.urlsafe_b64decode(parts[1] + '=' * (-len(parts[1]) % 4)))
+        return float(payload['exp'])
+    except (ValueError, KeyError, TypeError):
+        return None
+
+
+def authenticated(func: Callable[..., Awaitable[T]]) -> Callable[..., Awaitable[T]]:
+    """
+    Logs in again and replays the request once if the token has expired,
+    provided that the cloud instance has the credentials to do so.
+    """
+
+    @functools.wraps(func)
+    async def wrapper(self: TantronCloud, *args, **kwargs) -> T:
+        if not self.can_login:
+            return await func(self, *args, **kwargs)
+
+        expires_at = get_token_expiry(self.token) if self.token else None
+        if self.token is None or (expires_at is not None and expires_at - time.time() < TOKEN_REFRESH_MARGIN):
+            await self.async_refresh_token(self.token)
+
+        token = self.token
+        try:
+            return await func(self, *args, **kwargs)
+        except TantronAuthenticationError:
+            _LOGGER.debug('Token expired, logging in again')
+            await self.async_refresh_token(token)
+            return await func(self, *args, **kwargs)
 
+    return wrapper
 
-class TantronCloud:
 
-    _session: Optional[AsyncClient] = None
+class TantronCloud:
 
-    def __init__(self, hass: HomeAssistant, token: Optional[str] = None, household_id: Optional[str] = None):
+    def __init__(self,
+                 hass: HomeAssistant,
+                 token: Optional[str] = None,
+                 household_id: Optional[str] = None,
+                 account: Optional[str] = None,
+                 password: Optional[str] = None,
+                 token_callback: Optional[Callable[[str], None]] = None):
+        """
+        With `account` (the phone number) and `password` (hashed), an expired token is renewed automatically,
+        and `token_callback` is called with the new token.
+        """
         self.hass = hass
         self.token = token
         self.household_id = household_id
+        self.account = account
+        self.password = password
+        self.token_callback = token_callback
+        self.stats = TantronCloudStats()
+
+    @property
+    def can_login(self) -> bool:
+        return bool(self.account and self.password)
+
+    async def async_refresh_token(self, failed_token: Optional[str]):
+        """
+        Logs in again, unless another request has already done so since `failed_token` was used.
+        """
+        clients = get_clients(self.hass, self.account)
+        async with clients.login_lock:
+            if clients.token is not None and clients.token != failed_token:
+                self.token = clients.token
+            else:
+                await self._login(self.account, self.password)
+        if self.token_callback is not None:
+            self.token_callback(self.token)
 
     async def _get_session(self) -> AsyncClient:
-        if not self._session:
-            self._session = create_async_httpx_client(self.hass)
-            self._session.base_url = BASE_URL
-            self._session.headers.update({
-                'User-Agent': USER_AGENT
-            })
-        return self._session
+        return get_clients(self.hass, self.account).control
+
+    async def _get_poll_session(self) -> AsyncClient:
+        return get_clients(self.hass, self.account).poll
 
+    @instrumented('login')
     async def login(self, phone: str, password: str) -> str:
         """
         Authenticates with the Tantron cloud and returns the access token.
@@ -50,21 +228,27 @@ class TantronCloud:
         so that this integration cannot be used together with the WeApp.
         Official Android / iOS app is not affected.
         """
-        session = await self._get_session()
+        clients = get_clients(self.hass, phone)
 
         # if the phone has a cached token, verify it
-        if phone in token_cache:
+        cached_token = clients.get_cached_token()
+        if cached_token is not None:
             try:
-                self.token = token_cache[phone]
+                self.token = cached_token
                 user = await self.get_user()
                 if user is not None:
                     return self.token
             except Exception as e:
                 _LOGGER.debug('error while trying to reuse cached token', exc_info=e)
             self.token = None
-            del token_cache[phone]
+            clients.set_cached_token(None)
             _LOGGER.debug('cached token is invalid')
 
+        return await self._login(phone, password)
+
+    async def _login(self, phone: str, password: str) -> str:
+        session = await self._get_session()
+
         # if the password is not hashed, hash it
         if len(password) != 64:
             password = self.hash_password(password)
@@ -74,29 +258,32 @@ class TantronCloud:
                 'phone': phone,
                 'password': password
             })
-            data = self._read_response_json(response)
+            data = await self._read_response_json(response)
         except TantronCloudError as e:
             raise TantronAuthenticationError(e.code, e.message, e.data)
 
         self.token = data['accessToken']
-        token_cache[phone] = self.token
+        get_clients(self.hass, phone).set_cached_token(self.token)
         return data['accessToken']
 
+    @instrumented('get_user')
     async def get_user(self) -> dict:
         session = await self._get_session()
 
         response = await session.get('user-service/user', headers={
             HEADER_TOKEN: self.token
         })
-        return self._read_response_json(response)
+        return await self._read_response_json(response)
 
+    @instrumented('list_households')
+    @authenticated
     async def list_households(self) -> Dict[str, str]:
         session = await self._get_session()
 
         response = await session.get('user-service/normal/household/list', headers={
             HEADER_TOKEN: self.token
         })
-        data = self._read_response_json(response)
+        data = await self._read_response_json(response)
         if type(data) is not list:
             return {}
         return {
@@ -105,6 +292,8 @@ class TantronCloud:
             if i.get('gatewayBound') is True
         }
 
+    @instrumented('get_household')
+    @authenticated
     async def get_household(self, detailed: bool = False) -> dict:
         session = await self._get_session()
 
@@ -118,8 +307,10 @@ class TantronCloud:
         response = await session.get(url, headers={
             HEADER_TOKEN: self.token
         })
-        return self._read_response_json(response)
+        return await self._read_response_json(response)
 
+    @instrumented('get_household_coordinates')
+    @authenticated
     async def get_household_coordinates(self) -> Tuple[float, float]:
         session = await self._get_session()
 
@@ -129,9 +320,11 @@ class TantronCloud:
         response = await session.get(f'hinge-service/normal/court/household/{self.household_id}', headers={
             HEADER_TOKEN: self.token
         })
-        data = self._read_response_json(response)
+        data = await self._read_response_json(response)
         return float(data['lat']), float(data['lon'])
 
+    @instrumented('get_weather')
+    @authenticated
     async def get_weather(self, period: str, latitude: float, longitude: float) -> dict:
         session = await self._get_session()
 
@@ -141,8 +334,10 @@ class TantronCloud:
         }, headers={
             HEADER_TOKEN: self.token
         })
-        return self._read_response_json(response)
+        return await self._read_response_json(response)
 
+    @instrumented('get_gateway')
+    @authenticated
     async def get_gateway(self) -> dict:
         session = await self._get_session()
 
@@ -151,8 +346,10 @@ class TantronCloud:
         }, headers={
             HEADER_TOKEN: self.token
         })
-        return self._read_response_json(response)
+        return await self._read_response_json(response)
 
+    @instrumented('get_areas')
+    @authenticated
     async def get_areas(self) -> list:
         session = await self._get_session()
 
@@ -161,16 +358,63 @@ class TantronCloud:
         }, headers={
             HEADER_TOKEN: self.token
         })
-        data = self._read_response_json(response)
+        data = await self._read_response_json(response)
         return data.get('floorList', [])
 
     async def get_devices(self, device_type: Optional[str] = None, area: Optional[str] = None) -> List[dict]:
+        devices = []
+        async for page in self.iter_devices(device_type, area):
+            devices.extend(page)
+        return devices
+
+    async def iter_devices(self,
+                           device_type: Optional[str] = None,
+                           area: Optional[str] = None) -> AsyncIterator[List[dict]]:
+        """
+        Yields the device list page by page in the order they arrive.
+        The first page tells the total, the remaining pages are then fetched concurrently.
+        """
+        total, page_size, devices = await self.get_devices_page(1, device_type, area)
+        yield devices
+        if not devices:
+            return
+        # the server may cap the page size below the requested one, the first page shows what it actually used
+        pages = math.ceil(total / min(page_size, len(devices)))
+        if pages <= 1:
+            return
+
+        semaphore = asyncio.Semaphore(DEVICE_PAGE_CONCURRENCY)
+
+        async def _fetch_page(page_num: int) -> List[dict]:
+            async with semaphore:
+                return (await self.get_devices_page(page_num, device_type, area))[2]
+
+        tasks = [
+            self.hass.async_create_task(_fetch_page(page_num), f'tantron_device_page_{page_num}')
+            for page_num in range(2, pages + 1)
+        ]
+        try:
+            for task in asyncio.as_completed(tasks):
+                yield await task
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    @instrumented('get_devices')
+    @authenticated
+    async def get_devices_page(self,
+                               page_num: int,
+                               device_type: Optional[str] = None,
+                               area: Optional[str] = None) -> Tuple[int, int, List[dict]]:
+        """
+        Returns the total number of devices, the page size used by the server and the devices on the page.
+        """
         session = await self._get_session()
 
         params = {
             'householdId': self.household_id,
-            'pageNum': 1,
-            'pageSize': 1000
+            'pageNum': page_num,
+            'pageSize': DEVICE_PAGE_SIZE
         }
         if device_type:
             params['type'] = device_type
@@ -180,11 +424,22 @@ class TantronCloud:
         response = await session.get('device-service/normal/device/list', params=params, headers={
             HEADER_TOKEN: self.token
         })
-        data = self._read_response_json(response)
+        data = await self._read_response_json(response)
         if type(data) != dict:
-            return []
-        return data.get('list', [])
+            return 0, DEVICE_PAGE_SIZE, []
+        devices = data.get('list') or []
+        try:
+            total = int(data.get('total'))
+        except (TypeError, ValueError):
+            total = len(devices)
+        try:
+            page_size = int(data.get('pageSize'))
+        except (TypeError, ValueError):
+            page_size = DEVICE_PAGE_SIZE
+        return total, page_size if page_size > 0 else DEVICE_PAGE_SIZE, devices
 
+    @instrumented('put_state')
+    @authenticated
     async def put_state(self, connection: dict, commands: List[dict]):
         session = await self._get_session()
 
@@ -194,15 +449,17 @@ class TantronCloud:
         }, headers={
             HEADER_TOKEN: self.token
         })
-        return self._read_response_json(response)
+        return await self._read_response_json(response)
 
+    @instrumented('get_state')
+    @authenticated
     async def get_state(self, connections: List[dict]) -> List[dict]:
-        session = await self._get_session()
+        session = await self._get_poll_session()
 
         response = session.post('state-service/shadow/device/state/block', json=connections, headers={
             HEADER_TOKEN: self.token
-        }, timeout=None)
-        return self._read_response_json(await response)
+        }, timeout=POLL_TIMEOUT)
+        return await self._read_response_json(await response)
 
     @staticmethod
     def hash_password(password: str) -> str:
@@ -210,13 +467,16 @@ class TantronCloud:
         _LOGGER.debug(f'generated hash for password: {hashed}')
         return hashed
 
-    @staticmethod
-    def _read_response_json(response: Response):
+    async def _read_response_json(self, response: Response):
         try:
             response.raise_for_status()
         except Exception as e:
             raise TantronConnectionError from e
-        data = response.json()
+        self.stats.record_response(response)
+        if len(response.content) > JSON_EXECUTOR_THRESHOLD:
+            data = await self.hass.async_add_executor_job(json_loads, response.content)
+        else:
+            data = json_loads(response.content)
         if type(data) is not dict or 'code' not in data:
             raise TantronConnectionError('invalid response: ' + str(data))
         if data['code'] == HTTPStatus.FORBIDDEN:
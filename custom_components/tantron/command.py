@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import TYPE_CHECKING, NamedTuple, TypedDict
+
+from .error import TantronInvalidCommandError
+
+if TYPE_CHECKING:
+    from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+    from homeassistant.core import HomeAssistant
+    from .cloud import TantronCloud
+
+_LOGGER = logging.getLogger(__name__)
+
+COMMAND_WINDOW = 0.05  # seconds to gather commands before sending them
+COMMAND_CONCURRENCY = 8  # maximum number of concurrent put state requests
+
+
+class CommandTemplate(NamedTuple):
+    """
+    Everything needed to send a value to a device function, compiled once from its `sendList`.
+    """
+    type: str
+    data_type: Optional[str]
+    data_length: Optional[str]
+    addr: str
+    protocol_type: Optional[str]
+    sleep: Optional[int]  # milliseconds the gateway waits after the command, sent as is
+    values: Optional[FrozenSet[str]]  # allowed values from `dataValueList`, `None` if not restricted
+    max_value: Optional[int]  # largest integer fitting into `dataLength` bytes, `None` if not restricted
+
+    def build(self, value: str) -> dict:
+        value = str(value)
+        if self.values is not None and value not in self.values:
+            raise TantronInvalidCommandError(
+                f'invalid value for {self.type}: {value}, expected one of {sorted(self.values)}'
+            )
+        if self.max_value is not None and value.isdigit() and int(value) > self.max_value:
+            raise TantronInvalidCommandError(f'value for {self.type} exceeds the data length: {value}')
+        return {
+            'dataType': self.data_type,
+            'dataLength': self.data_length,
+            'addr': self.addr,
+            'protocolType': self.protocol_type,
+            'value': value,
+            'sleep': self.sleep,
+            'type': self.type
+        }
+
+
+def compile_command_templates(functions: List[dict]) -> Dict[str, CommandTemplate]:
+    """
+    Compiles the command templates of all controllable functions.
+    Functions with a malformed `sendList` are left out, so that they are rejected without a request.
+    """
+    result: Dict[str, CommandTemplate] = {}
+    for function in functions:
+        if not function.get('type') or not function.get('sendList'):
+            continue
+        send_info = function['sendList'][0]
+        if not send_info.get('addr'):
+            _LOGGER.debug('Function %s has no address, it cannot be controlled', function['type'])
+            continue
+
+        try:
+            data_length = int(send_info.get('dataLength') or 0)
+        except (TypeError, ValueError):
+            _LOGGER.debug('Function %s has an invalid data length, it cannot be controlled', function['type'])
+            continue
+
+        values = send_info.get('dataValueList')
+        result[function['type']] = CommandTemplate(
+            type=function['type'],
+            data_type=send_info.get('dataType'),
+            data_length=send_info.get('dataLength'),
+            addr=send_info['addr'],
+            protocol_type=send_info.get('protocolType'),
+            sleep=send_info.get('sleep'),
+            values=frozenset(str(value) for value in values) if values else None,
+            max_value=256 ** data_length - 1 if data_length > 0 else None
+        )
+    return result
+
+
+class PendingCommands(TypedDict):
+    connection: dict
+    commands: Dict[Any, dict]  # keyed by function type, so that the last write wins
+    futures: List[asyncio.Future]
+
+
+class TantronCommandQueue:
+    """
+    Gathers commands issued within a short window and sends them with as few requests as possible.
+
+    The put state API accepts multiple commands for a single device,
+    so commands are merged per device and different devices are sent concurrently.
+    Devices are keyed by `masterId` and `deviceConfigId`, as config ids are only unique per master.
+    """
+
+    def __init__(self,
+                 hass: HomeAssistant,
+                 cloud: TantronCloud,
+                 window: float = COMMAND_WINDOW,
+                 concurrency: int = COMMAND_CONCURRENCY):
+        self.hass = hass
+        self.cloud = cloud
+        self.window = window
+        self._pending: Dict[Tuple[str, str], PendingCommands] = {}  # (master id, config id) -> commands
+        self._flush_task: Optional[asyncio.Task] = None
+        self._semaphore = asyncio.Semaphore(concurrency)
+
+    async def async_put_states(self, batch: List[Tuple[dict, List[dict]]]) -> List[Optional[Exception]]:
+        """
+        Queues the commands of multiple devices into the same window and waits until all of them have been sent.
+        Returns the error of each device, or `None` if it succeeded.
+        """
+        futures = [self._queue(connection, commands) for connection, commands in batch]
+        return list(await asyncio.gather(*futures, return_exceptions=True))
+
+    def _queue(self, connection: dict, commands: List[dict]) -> asyncio.Future:
+        key = (str(connection['masterId']), str(connection['deviceConfigId']))
+        pending = self._pending.get(key)
+        if pending is None:
+            pending = self._pending[key] = PendingCommands(connection=connection, commands={}, futures=[])
+        else:
+            # same device, the latest connection carries the latest config version
+            pending['connection'] = connection
+        for command in commands:
+            # commands without a function type cannot be merged
+            pending['commands'][command.get('type') or object()] = command
+
+        future = self.hass.loop.create_future()
+        pending['futures'].append(future)
+        if self._flush_task is None:
+            self._flush_task = self.hass.async_create_task(self._async_flush(), 'tantron_command_flush')
+        return future
+
+    async def _async_flush(self) -> None:
+        await asyncio.sleep(self.window)
+        batch, self._pending, self._flush_task = self._pending, {}, None
+        _LOGGER.debug('Sending commands for %d devices', len(batch))
+        await asyncio.gather(*(self._async_send(pending) for pending in batch.values()))
+
+    async def _async_send(self, pending: PendingCommands) -> None:
+        try:
+            async with self._semaphore:
+                await self.cloud.put_state(pending['connection'], list(pending['commands'].values()))
+        except asyncio.CancelledError:
+            for future in pending['futures']:
+                future.cancel()
+            raise
+        except Exception as e:
+            for future in pending['futures']:
+                if not future.done():
+                    future.set_exception(e)
+        else:
+            for future in pending['futures']:
+                if not future.done():
+                    future.set_result(None)
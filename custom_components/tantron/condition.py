@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+# The following definitions are adapted from `cheny95/qweather`, originally licensed under the GPL-3.0
+# https://github.com/cheny95/qweather/blob/ba3f30b/custom_components/qweather/condition.py
+# https://developers.home-assistant.io/docs/core/entity/weather#recommended-values-for-state-and-condition
+# https://dev.qweather.com/docs/resource/icons/
+
+CLEAR_NIGHT = 'clear-night'  # 晴（夜）
+CLOUDY = 'cloudy'  # 阴
+EXCEPTIONAL = 'exceptional'  # 未知
+FOG = 'fog'  # 雾
+HAIL = 'hail'  # 冰雹
+LIGHTNING = 'lightning'  # 闪电
+LIGHTNING_RAINY = 'lightning-rainy'  # 雷阵雨
+PARTLY_CLOUDY = 'partlycloudy'  # 多云
+POURING = 'pouring'  # 暴雨
+RAINY = 'rainy'  # 雨
+SNOWY = 'snowy'  # 雪
+SNOWY_RAINY = 'snowy-rainy'  # 雨夹雪
+SUNNY = 'sunny'  # 晴
+WINDY = 'windy'  # 大风
+WINDY_VARIANT = 'windy-variant'  # 大风（有云）
+
+CONDITION_MAP = {
+    '100': SUNNY,  # 晴
+    '101': PARTLY_CLOUDY,  # 多云
+    '102': PARTLY_CLOUDY,  # 少云
+    '103': PARTLY_CLOUDY,  # 晴间多云
+    '104': CLOUDY,  # 阴
+    '150': CLEAR_NIGHT,  # 晴
+    '151': PARTLY_CLOUDY,  # 多云
+    '152': PARTLY_CLOUDY,  # 少云
+    '153': PARTLY_CLOUDY,  # 夜间多云
+    '300': RAINY,  # 阵雨
+    '301': RAINY,  # 强阵雨
+    '302': LIGHTNING_RAINY,  # 雷阵雨
+    '303': LIGHTNING_RAINY,  # 强雷阵雨
+    '304': HAIL,  # 雷阵雨伴有冰雹
+    '305': RAINY,  # 小雨
+    '306': RAINY,  # 中雨
+    '307': POURING,  # 大雨
+    '308': POURING,  # 极端降雨
+    '309': RAINY,  # 毛毛雨/细雨
+    '310': POURING,  # 暴雨
+    '311': POURING,  # 大暴雨
+    '312': POURING,  # 特大暴雨
+    '313': RAINY,  # 冻雨
+    '314': RAINY,  # 小到中雨
+    '315': RAINY,  # 中到大雨
+    '316': POURING,  # 大到暴雨
+    '317': POURING,  # 暴雨到大暴雨
+    '318': POURING,  # 大暴雨到特大暴雨
+    '350': RAINY,  # 阵雨
+    '351': POURING,  # 强阵雨
+    '399': RAINY,  # 雨
+    '400': SNOWY,  # 小雪
+    '401': SNOWY,  # 中雪
+    '402': SNOWY,  # 大雪
+    '403': SNOWY,  # 暴雪
+    '404': SNOWY_RAINY,  # 雨夹雪
+    '405': SNOWY_RAINY,  # 雨雪天气
+    '406': SNOWY_RAINY,  # 阵雨夹雪
+    '407': RAINY,  # 阵雪
+    '408': RAINY,  # 小到中雪
+    '409': RAINY,  # 中到大雪
+    '410': SNOWY,  # 大到暴雪
+    '456': SNOWY_RAINY,  # 阵雨夹雪
+    '457': RAINY,  # 阵雪
+    '499': RAINY,  # 雪
+    '500': FOG,  # 薄雾
+    '501': FOG,  # 雾
+    '502': FOG,  # 霾
+    '503': FOG,  # 扬沙
+    '504': FOG,  # 浮尘
+    '507': FOG,  # 沙尘暴
+    '508': FOG,  # 强沙尘暴
+    '509': FOG,  # 浓雾
+    '510': FOG,  # 强浓雾
+    '511': FOG,  # 中度霾
+    '512': FOG,  # 重度霾
+    '513': FOG,  # 严重霾
+    '514': FOG,  # 大雾
+    '515': FOG,  # 特强浓雾
+}
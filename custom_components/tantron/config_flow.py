@@ -5,10 +5,12 @@ from typing import TYPE_CHECKING, TypedDict
 
 import voluptuous as vol
 
-from homeassistant.config_entries import ConfigFlow
+from homeassistant.config_entries import ConfigEntry, ConfigFlow, OptionsFlow
+from homeassistant.core import callback
+from homeassistant.helpers.selector import SelectSelector, SelectSelectorConfig, SelectSelectorMode
 
 from .cloud import TantronCloud
-from .const import DOMAIN
+from .const import DOMAIN, CONF_SHARD_BY, CONF_SHARD_SIZE, DEFAULT_SHARD_SIZE, SHARD_BY_NONE, SHARD_BY_OPTIONS
 from .error import TantronConnectionError, TantronAuthenticationError, TantronCloudError
 
 if TYPE_CHECKING:
@@ -33,6 +35,11 @@ class ConfigFlow(ConfigFlow, domain=DOMAIN):
     VERSION = 1
     data: Optional[Dict[str, str]] = None
 
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry: ConfigEntry) -> TantronOptionsFlow:
+        return TantronOptionsFlow()
+
     async def async_step_user(self, user_input: Optional[Dict[str, Any]] = None):
         self.data = None
 
@@ -41,7 +48,7 @@ class ConfigFlow(ConfigFlow, domain=DOMAIN):
             try:
                 phone = user_input['phone']
                 password = TantronCloud.hash_password(user_input['password'])
-                cloud = TantronCloud(self.hass)
+                cloud = TantronCloud(self.hass, account=phone)
                 token = await cloud.login(phone, password)
                 households = await cloud.list_households()
             except TantronConnectionError:
@@ -75,7 +82,8 @@ class ConfigFlow(ConfigFlow, domain=DOMAIN):
         if user_input is not None:
             try:
                 household_id = user_input['household']
-                cloud = TantronCloud(self.hass, token=self.data['token'], household_id=household_id)
+                cloud = TantronCloud(self.hass, token=self.data['token'], household_id=household_id,
+                                     account=self.data['phone'])
                 household = await cloud.get_household()
             except TantronConnectionError:
                 errors['base'] = 'connection_error'
@@ -103,7 +111,7 @@ class ConfigFlow(ConfigFlow, domain=DOMAIN):
     async def async_step_reauth(self, entry_data: ConfigEntryData):
         entry = self._get_reauth_entry()
         try:
-            cloud = TantronCloud(self.hass, household_id=entry_data['household'])
+            cloud = TantronCloud(self.hass, household_id=entry_data['household'], account=entry_data['phone'])
             token = await cloud.login(entry_data['phone'], entry_data['password'])
             household = await cloud.get_household()
         except Exception:
@@ -113,3 +121,21 @@ class ConfigFlow(ConfigFlow, domain=DOMAIN):
         return self.async_update_reload_and_abort(entry, data_updates={
             'token': token
         })
+
+
+class TantronOptionsFlow(OptionsFlow):
+
+    async def async_step_init(self, user_input: Optional[Dict[str, Any]] = None):
+        if user_input is not None:
+            return self.async_create_entry(data=user_input)
+
+        options = self.config_entry.options
+        return self.async_show_form(step_id='init', data_schema=vol.Schema({
+            vol.Required(CONF_SHARD_BY, default=options.get(CONF_SHARD_BY, SHARD_BY_NONE)): SelectSelector(
+                SelectSelectorConfig(options=SHARD_BY_OPTIONS, mode=SelectSelectorMode.DROPDOWN,
+                                     translation_key=CONF_SHARD_BY)
+            ),
+            vol.Required(CONF_SHARD_SIZE, default=options.get(CONF_SHARD_SIZE, DEFAULT_SHARD_SIZE)): vol.All(
+                vol.Coerce(int), vol.Range(min=1, max=1000)
+            )
+        }))
@@ -15,3 +15,14 @@ PLATFORMS: list[Platform] = [
 ]
 
 EVENT_PUT_STATE = f'{DOMAIN}.put_state'
+
+SERVICE_PUT_STATE = 'put_state'
+
+CONF_SHARD_BY = 'shard_by'  # how devices are split into concurrent shadow polls
+CONF_SHARD_SIZE = 'shard_size'  # maximum devices per shadow poll when sharded
+SHARD_BY_NONE = 'none'
+SHARD_BY_MASTER = 'master'
+SHARD_BY_AREA = 'area'
+SHARD_BY_SIZE = 'size'
+SHARD_BY_OPTIONS = [SHARD_BY_NONE, SHARD_BY_MASTER, SHARD_BY_AREA, SHARD_BY_SIZE]
+DEFAULT_SHARD_SIZE = 200
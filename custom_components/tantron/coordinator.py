@@ -1,19 +1,30 @@
 from __future__ import annotations
 
 import asyncio
+import functools
 import logging
 import time
 from datetime import timedelta
-from typing import TYPE_CHECKING, Dict, TypedDict
+from typing import TYPE_CHECKING, Dict, NamedTuple, TypedDict, TypeVar
 
-from homeassistant.core import callback
+from homeassistant.core import CALLBACK_TYPE, callback
+from homeassistant.exceptions import ConfigEntryAuthFailed
+from homeassistant.helpers import device_registry as dr
 from homeassistant.helpers.device_registry import DeviceInfo
+from homeassistant.helpers.event import async_call_later
+from homeassistant.helpers.storage import Store
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, CoordinatorEntity
 
-from .const import DOMAIN
+from .cloud import POLL_MAX_SHARDS
+from .command import CommandTemplate, TantronCommandQueue, compile_command_templates
+from .const import DOMAIN, CONF_SHARD_BY, CONF_SHARD_SIZE, DEFAULT_SHARD_SIZE, SHARD_BY_AREA, SHARD_BY_MASTER, \
+    SHARD_BY_NONE
+from .error import TantronCloudError
+from .state import TantronState
+from .transport import POLL_DELAY_IDLE, LongPollTransport
 
 if TYPE_CHECKING:
-    from typing import List, Optional
+    from typing import Awaitable, Callable, List, Optional, Set, Tuple, Type
     from homeassistant.config_entries import ConfigEntry
     from homeassistant.core import HomeAssistant
     from .cloud import TantronCloud
@@ -21,6 +32,29 @@ if TYPE_CHECKING:
 
 _LOGGER = logging.getLogger(__name__)
 
+T = TypeVar('T')
+
+OPTIMISTIC_TIMEOUT = 10.0  # seconds to wait for the shadow to confirm commanded values before reverting them
+RESUBSCRIBE_DELAY = 0.5  # seconds to gather newly subscribed devices before restarting the shadow poll
+BACKGROUND_RETRY_DELAY = 60  # seconds before retrying a failed refresh after starting from cache
+
+STORAGE_VERSION = 1
+CACHE_SAVE_DELAY = 60  # seconds from the first unsaved change until the cache is written
+
+
+def create_store(hass: HomeAssistant, entry_id: str) -> Store:
+    return Store(hass, STORAGE_VERSION, f'{DOMAIN}.{entry_id}')
+
+
+class PendingState(TypedDict):
+    values: Dict[str, Optional[str]]  # function type -> value before the command, used for rollback
+    version: int  # shadow version at the time the command was sent
+
+
+class SubscriptionOptions(NamedTuple):
+    shard_by: str
+    shard_size: int
+
 
 class TantronDevice(TypedDict):
     id: str
@@ -31,9 +65,12 @@ class TantronDevice(TypedDict):
     icon: Optional[str]
     connection: dict
     functions: List[dict]
+    commands: Dict[str, CommandTemplate]  # function type -> compiled command template
     values: Optional[Dict[str, str]]
     info: DeviceInfo
     updated_at: Optional[int]  # ns timestamp of last update, used for change detection
+    pending: Optional[PendingState]  # optimistic values not yet confirmed by the shadow
+    verified: bool  # false if loaded from cache and not yet confirmed by the cloud
 
 
 class TantronCoordinator(DataUpdateCoordinator[Dict[str, TantronDevice]]):
@@ -41,20 +78,48 @@ class TantronCoordinator(DataUpdateCoordinator[Dict[str, TantronDevice]]):
     def __init__(self, hass: HomeAssistant, entry: ConfigEntry[EntryRuntimeData], cloud: TantronCloud):
         super().__init__(hass, _LOGGER, config_entry=entry, name=DOMAIN, update_interval=timedelta(hours=1))
         self.cloud = cloud
+        self.command_queue = TantronCommandQueue(hass, cloud)
         self.gateway: Optional[dict] = None
         self.gateway_info: Optional[DeviceInfo] = None
+        self.gateway_verified = False
+        self.gateway_task: Optional[asyncio.Task] = None  # shared by the shards refreshing an offline gateway
         self.areas: Dict[str, str] = {}
         self.devices: Dict[str, TantronDevice] = {}
-        self.device_master_ids: List[str] = []
+        self.devices_by_config_id: Dict[str, TantronDevice] = {}
+        self.devices_by_type: Dict[str, Dict[str, TantronDevice]] = {}  # device type -> device id -> device
+        self.devices_by_area: Dict[str, Dict[str, TantronDevice]] = {}  # area id -> device id -> device
+        self.device_listeners: Dict[str, List[CALLBACK_TYPE]] = {}
+        self.devices_added_listeners: List[Callable[[List[TantronDevice]], None]] = []
+        self.pending_timeouts: Dict[str, CALLBACK_TYPE] = {}
         self.subscription_task: Optional[asyncio.Task] = None
+        self.subscribed_ids: Set[str] = set()  # devices carried by the in-flight shadow poll
+        self.resubscribe_handle: Optional[CALLBACK_TYPE] = None
+        self.subscription_shards: List[List[str]] = []  # device ids polled by each concurrent shadow poll
+        self.subscription_transports: List[Optional[str]] = []  # transport currently used by each shard
+        self.subscription_options = self._get_subscription_options()
+        self.store = create_store(hass, entry.entry_id)
+        self.refresh_in_background = False
+        self.background_retry_handle: Optional[CALLBACK_TYPE] = None
+        self.cache_save_handle: Optional[CALLBACK_TYPE] = None
+        self.refresh_timings: Dict[str, float] = {}  # seconds taken by each phase of the last refresh
 
     async def _async_setup(self) -> None:
-        await self._load_gateway()
-        await self._load_areas()
-        await self._load_devices()
-
-    async def _load_gateway(self):
-        self.gateway = await self.cloud.get_gateway()
+        # come up from the cached topology if available, the cloud is then refreshed in the background
+        cache: Optional[dict] = await self.store.async_load()
+        if not cache:
+            return
+        try:
+            self._set_gateway(cache['gateway'])
+            self.areas = cache['areas']
+            self._merge_devices(self._build_devices(cache['devices'], verified=False), verified=False)
+        except (KeyError, TypeError):
+            _LOGGER.warning('Ignoring invalid Tantron topology cache', exc_info=True)
+            return
+        self.refresh_in_background = True
+        _LOGGER.debug('Loaded %d devices from cache', len(self.devices))
+
+    def _set_gateway(self, gateway: dict):
+        self.gateway = gateway
         self.gateway_info = DeviceInfo(
             identifiers={(DOMAIN, self.gateway['id'])},
             manufacturer='Tantron',
@@ -64,9 +129,8 @@ class TantronCoordinator(DataUpdateCoordinator[Dict[str, TantronDevice]]):
             sw_version=self.gateway.get('versionName')
         )
 
-    async def _load_areas(self):
+    def _set_areas(self, floors: List[dict]):
         result: Dict[str, str] = {}
-        floors = await self.cloud.get_areas()
         for floor in floors:
             for area in floor.get('areaList', []):
                 name = area['name']
@@ -75,42 +139,117 @@ class TantronCoordinator(DataUpdateCoordinator[Dict[str, TantronDevice]]):
                 result[area['id']] = name
         self.areas = result
 
-    async def _load_devices(self):
-        result: Dict[str, TantronDevice] = {}
-        master_ids = set()
-
-        for device in await self.cloud.get_devices():
-            device_id = f'{device["masterId"]}.{device["id"]}'
-            master_ids.add(device['masterId'])
-            result[device_id] = TantronDevice(
-                id=device_id,
-                type=device.get('type'),
+    def _build_device(self, device: dict, verified: bool = True) -> TantronDevice:
+        device_id = f'{device["masterId"]}.{device["id"]}'
+        return TantronDevice(
+            id=device_id,
+            type=device.get('type'),
+            name=device.get('name'),
+            area_id=device.get('area'),
+            config_id=device['id'],
+            icon=device.get('icon'),
+            connection={
+                'deviceConfigId': device['id'],
+                'configVersion': device['configVersion'],
+                'masterId': device['masterId'],
+                'version': 0  # value unknown
+            },
+            functions=device.get('functionList', []),
+            commands=compile_command_templates(device.get('functionList', [])),
+            values=device.get('functionValues'),
+            info=DeviceInfo(
+                identifiers={(DOMAIN, device_id)},
+                manufacturer='Tantron',
                 name=device.get('name'),
-                area_id=device.get('area'),
-                config_id=device['id'],
-                icon=device.get('icon'),
-                connection={
-                    'deviceConfigId': device['id'],
-                    'configVersion': device['configVersion'],
-                    'masterId': device['masterId'],
-                    'version': 0  # value unknown
-                },
-                functions=device.get('functionList', []),
-                values=device.get('functionValues'),
-                info=DeviceInfo(
-                    identifiers={(DOMAIN, device_id)},
-                    manufacturer='Tantron',
-                    name=device.get('name'),
-                    suggested_area=self.areas.get(device.get('area', '')),
-                    via_device=(DOMAIN, self.gateway['id'])
-                ),
-                updated_at=time.time_ns()
-            )
-
-        self.devices = result
-        self.device_master_ids = list(master_ids)
+                suggested_area=self.areas.get(device.get('area', '')),
+                via_device=(DOMAIN, self.gateway['id'])
+            ),
+            updated_at=time.time_ns(),
+            pending=None,
+            verified=verified
+        )
 
-        if self.subscription_task is not None:
+    def _build_devices(self, devices: List[dict], verified: bool = True) -> Dict[str, TantronDevice]:
+        loaded: Dict[str, TantronDevice] = {}
+        for raw in devices:
+            device = self._build_device(raw, verified)
+            loaded[device['id']] = device
+        return loaded
+
+    def _merge_devices(self, loaded: Dict[str, TantronDevice], verified: bool = True):
+        """
+        Merges the built devices of a device list into the current devices.
+        Existing devices are patched in place, so that entities, values and shadow versions are kept.
+        """
+        added = loaded.keys() - self.devices.keys()
+        removed = self.devices.keys() - loaded.keys()
+        patched: Set[str] = set()
+
+        for device_id in removed:
+            del self.devices[device_id]
+            self._cancel_pending_timeout(device_id)
+        for device_id in added:
+            self.devices[device_id] = loaded[device_id]
+        for device_id, device in loaded.items():
+            existing = self.devices[device_id]
+            if existing is device:
+                continue
+            if not existing['verified'] and verified:
+                # cached values are replaced by the fresh ones from the device list
+                existing['verified'] = True
+                if device['values'] is not None:
+                    existing['values'] = device['values']
+            elif (existing['connection']['configVersion'] == device['connection']['configVersion'] and
+                    existing['info'] == device['info']):
+                continue
+            existing.update(
+                type=device['type'],
+                name=device['name'],
+                area_id=device['area_id'],
+                icon=device['icon'],
+                functions=device['functions'],
+                commands=device['commands'],
+                info=device['info'],
+                updated_at=device['updated_at']
+            )
+            existing['connection']['configVersion'] = device['connection']['configVersion']
+            if existing['values'] is None:
+                existing['values'] = device['values']
+            patched.add(device_id)
+
+        self.devices_by_config_id = {}
+        for device in self.devices.values():
+            config_id = str(device['config_id'])
+            if config_id in self.devices_by_config_id:
+                # the shadow usually identifies devices by config id only, their states cannot be told apart
+                _LOGGER.warning('Devices %s and %s share the config id %s, shadow states are only applied to the '
+                                'former unless the shadow returns their master id',
+                                self.devices_by_config_id[config_id]['id'], device['id'], config_id)
+                continue
+            self.devices_by_config_id[config_id] = device
+        self.devices_by_type = {}
+        self.devices_by_area = {}
+        for device_id, device in self.devices.items():
+            self.devices_by_type.setdefault(device['type'], {})[device_id] = device
+            if device['area_id']:
+                self.devices_by_area.setdefault(device['area_id'], {})[device_id] = device
+        if added or removed or patched:
+            _LOGGER.debug('Devices reloaded: %d added, %d removed, %d patched', len(added), len(removed), len(patched))
+        self.async_update_device_listeners(patched)
+        if added:
+            self.async_update_devices_added_listeners([self.devices[device_id] for device_id in added])
+        if removed:
+            self._async_remove_registry_devices(removed)
+
+        # an in-flight poll only carries the previous connections, restart it if they have changed
+        if self.subscription_task is None or self.subscription_task.done() or added or removed:
+            self._restart_subscription()
+
+    def _restart_subscription(self):
+        if self.resubscribe_handle is not None:
+            self.resubscribe_handle()
+            self.resubscribe_handle = None
+        if self.subscription_task is not None and not self.subscription_task.done():
             self.subscription_task.cancel()
         self.subscription_task = self.config_entry.async_create_background_task(
             self.hass,
@@ -118,58 +257,499 @@ class TantronCoordinator(DataUpdateCoordinator[Dict[str, TantronDevice]]):
             'tantron_subscription_task'
         )
 
+    async def async_stop_subscription(self):
+        """
+        Stops the shadow poll, so that the connection pools can be closed without interrupting it.
+        """
+        if self.resubscribe_handle is not None:
+            self.resubscribe_handle()
+            self.resubscribe_handle = None
+        if self.subscription_task is not None and not self.subscription_task.done():
+            self.subscription_task.cancel()
+            await asyncio.wait([self.subscription_task])
+        self.subscription_task = None
+
+    @callback
+    def _async_resubscribe(self, _now=None):
+        self.resubscribe_handle = None
+        if self.subscription_task is not None and not self.subscription_task.done():
+            self._restart_subscription()
+
+    def _cache_data(self) -> dict:
+        # devices are stored in the shape of the device list, so that they load through `_build_devices`
+        return {
+            'gateway': self.gateway,
+            'areas': self.areas,
+            'devices': [{
+                'id': device['config_id'],
+                'masterId': device['connection']['masterId'],
+                'configVersion': device['connection']['configVersion'],
+                'type': device['type'],
+                'name': device['name'],
+                'area': device['area_id'],
+                'icon': device['icon'],
+                'functionList': device['functions'],
+                'functionValues': device['values']
+            } for device in self.devices.values()]
+        }
+
     async def _async_update_data(self):
+        if self.refresh_in_background:
+            # started from cache, do not block the setup on the cloud
+            self.refresh_in_background = False
+            self.config_entry.async_create_background_task(
+                self.hass, self._async_background_refresh(), 'tantron_refresh_task'
+            )
+            return self.devices
+
         _LOGGER.debug('Updating Tantron data')
-        await self._load_gateway()
-        await self._load_devices()
-        self.data = self.devices
+        started_at = time.monotonic()
+        # the fetches are independent, only building the devices needs the gateway and areas
+        topology = self.hass.async_create_task(self._async_update_topology(), 'tantron_topology_task')
+        _, _, devices = await asyncio.gather(
+            self._async_timed('household', self._async_verify_household()),
+            topology,
+            self._async_timed('devices', self._async_fetch_devices(topology))
+        )
+        self.gateway_verified = True
+        self._merge_devices(devices)
+        self.refresh_timings['total'] = time.monotonic() - started_at
+        _LOGGER.debug('Tantron data updated, timings: %s', self.refresh_timings)
+        self._schedule_cache_save()
+        return self.devices
+
+    async def _async_background_refresh(self):
+        """
+        Refreshes after starting from cache, retrying shortly on failure instead of waiting for the update interval,
+        as the cached devices stay unverified until a refresh succeeds.
+        """
+        await self.async_refresh()
+        if self.last_update_success or isinstance(self.last_exception, ConfigEntryAuthFailed):
+            return
+        _LOGGER.debug('Refresh after starting from cache failed, retrying in %d seconds', BACKGROUND_RETRY_DELAY)
+        self.background_retry_handle = async_call_later(
+            self.hass, BACKGROUND_RETRY_DELAY, self._async_retry_background_refresh
+        )
+
+    @callback
+    def _async_retry_background_refresh(self, _now=None):
+        self.background_retry_handle = None
+        if not self.last_update_success:
+            self.config_entry.async_create_background_task(
+                self.hass, self._async_background_refresh(), 'tantron_refresh_task'
+            )
+
+    @callback
+    def _schedule_cache_save(self) -> None:
+        # unlike `Store.async_delay_save`, further changes do not postpone the save,
+        # so that the cache is still written while devices keep changing
+        if self.cache_save_handle is None:
+            self.cache_save_handle = async_call_later(self.hass, CACHE_SAVE_DELAY, self._async_save_cache)
+
+    @callback
+    def _async_save_cache(self, _now=None) -> None:
+        self.cache_save_handle = None
+        self.store.async_delay_save(self._cache_data)
+
+    async def _async_verify_household(self):
+        try:
+            await self.cloud.get_household()
+        except TantronCloudError as e:
+            raise ConfigEntryAuthFailed from e
+
+    async def _async_update_topology(self):
+        gateway, floors = await asyncio.gather(
+            self._async_timed('gateway', self.cloud.get_gateway()),
+            self._async_timed('areas', self.cloud.get_areas())
+        )
+        self._set_gateway(gateway)
+        self._set_areas(floors)
+
+    async def _async_fetch_devices(self, topology: Awaitable[None]) -> Dict[str, TantronDevice]:
+        """
+        Builds the devices page by page while the rest of the device list is still arriving.
+        """
+        loaded: Dict[str, TantronDevice] = {}
+        async for page in self.cloud.iter_devices():
+            # devices refer to the gateway and their areas
+            await topology
+            loaded.update(self._build_devices(page))
+        return loaded
+
+    async def _async_timed(self, phase: str, coro: Awaitable[T]) -> T:
+        started_at = time.monotonic()
+        try:
+            return await coro
+        finally:
+            self.refresh_timings[phase] = time.monotonic() - started_at
+
+    async def async_shutdown(self) -> None:
+        await super().async_shutdown()
+        if self.background_retry_handle is not None:
+            self.background_retry_handle()
+            self.background_retry_handle = None
+        if self.resubscribe_handle is not None:
+            self.resubscribe_handle()
+            self.resubscribe_handle = None
+        for device_id in list(self.pending_timeouts):
+            self._cancel_pending_timeout(device_id)
+        if self.cache_save_handle is not None:
+            self.cache_save_handle()
+            self.cache_save_handle = None
+        if self.gateway is not None:
+            await self.store.async_save(self._cache_data())
 
     def get_device(self, device_id: str) -> Optional[dict]:
         if device_id == self.gateway['id']:
             return self.gateway
         return self.devices.get(device_id)
 
-    async def _async_subscribe_data(self):
-        while True:
-            try:
-                if not self.devices:
-                    await asyncio.sleep(1)
-                    continue
+    @property
+    def gateway_online(self) -> bool:
+        return self.gateway is None or self.gateway.get('onlineState') != 0
+
+    async def async_refresh_gateway(self) -> None:
+        """
+        Fetches the gateway again, concurrent callers share a single request.
+        """
+        if self.gateway_task is None or self.gateway_task.done():
+            self.gateway_task = self.hass.async_create_task(self._async_refresh_gateway(), 'tantron_gateway_task')
+        await asyncio.shield(self.gateway_task)
+
+    async def _async_refresh_gateway(self) -> None:
+        was_online = self.gateway_online
+        self._set_gateway(await self.cloud.get_gateway())
+        self.gateway_verified = True
+        if self.gateway_online != was_online:
+            _LOGGER.debug('Gateway is %s', 'online' if self.gateway_online else 'offline')
+            self.async_update_listeners()
+
+    @callback
+    def async_add_devices_added_listener(self,
+                                         update_callback: Callable[[List[TantronDevice]], None]) -> Callable[[], None]:
+        """
+        Listens for devices added to the household after the initial load, so that platforms can add their entities.
+        """
+        self.devices_added_listeners.append(update_callback)
+
+        @callback
+        def remove_listener() -> None:
+            self.devices_added_listeners.remove(update_callback)
+
+        return remove_listener
+
+    @callback
+    def async_update_devices_added_listeners(self, devices: List[TantronDevice]) -> None:
+        for update_callback in list(self.devices_added_listeners):
+            update_callback(devices)
+
+    @callback
+    def _async_remove_registry_devices(self, device_ids: Set[str]) -> None:
+        # removing the device from the registry also removes its entities
+        device_registry = dr.async_get(self.hass)
+        for device_id in device_ids:
+            device = device_registry.async_get_device(identifiers={(DOMAIN, device_id)})
+            if device is not None:
+                device_registry.async_update_device(device.id, remove_config_entry_id=self.config_entry.entry_id)
+
+    @callback
+    def async_add_device_listener(self, device_id: str, update_callback: CALLBACK_TYPE) -> Callable[[], None]:
+        """
+        Listens for state changes of a single device.
+        Unlike coordinator listeners, these are only called when the device itself has changed.
+
+        Only devices with listeners are polled from the shadow,
+        so entities that are disabled, and thus never added, do not cost anything.
+        """
+        listeners = self.device_listeners.setdefault(device_id, [])
+        listeners.append(update_callback)
+        if device_id not in self.subscribed_ids:
+            self._schedule_resubscribe()
+
+        @callback
+        def remove_listener() -> None:
+            listeners.remove(update_callback)
+            if not listeners and self.device_listeners.get(device_id) is listeners:
+                del self.device_listeners[device_id]
+                if device_id in self.subscribed_ids:
+                    # the device has no entities left, stop polling it
+                    self._schedule_resubscribe()
+
+        return remove_listener
+
+    def _schedule_resubscribe(self) -> None:
+        # entities are added and removed in bursts, restart the poll once for all of them
+        if self.resubscribe_handle is None:
+            self.resubscribe_handle = async_call_later(self.hass, RESUBSCRIBE_DELAY, self._async_resubscribe)
 
-                connections = [device['connection'] for device in self.devices.values()]
-                for item in await self.cloud.get_state(connections):
-                    if not item.get('deviceConfigId'):
-                        continue
+    @callback
+    def async_update_device_listeners(self, device_ids: Set[str]) -> None:
+        for device_id in device_ids:
+            for update_callback in list(self.device_listeners.get(device_id, [])):
+                update_callback()
+
+    def _resolve_state_item(self, item: dict) -> Optional[TantronDevice]:
+        # the shadow normally returns only `deviceConfigId`, prefer the fully qualified id if it has `masterId`
+        if item.get('masterId'):
+            return self.devices.get(f'{item["masterId"]}.{item["deviceConfigId"]}')
+        return self.devices_by_config_id.get(str(item['deviceConfigId']))
+
+    async def async_send_values(self, values: Dict[str, Dict[str, str]]) -> None:
+        """
+        Sends values to multiple devices within the same command window, keyed by device id and function type.
+        Functions that cannot be controlled are skipped.
+        Values are applied optimistically once queued, and reverted for devices whose request has failed.
+        """
+        batch = []
+        for device_id, device_values in values.items():
+            device = self.devices.get(device_id)
+            if device is None:
+                continue
+            commands = [
+                device['commands'][key].build(value)
+                for key, value in device_values.items()
+                if key in device['commands']
+            ]
+            if commands:
+                batch.append((device, commands))
+        if not batch:
+            return
+
+        snapshots = []
+        for device, commands in batch:
+            commanded = {command['type']: command['value'] for command in commands}
+            # values and pending keys before this batch, so that a failure only reverts its own values
+            snapshots.append((
+                commanded,
+                {key: device['values'].get(key) for key in commanded} if device['values'] is not None else {},
+                set(device['pending']['values']) if device['pending'] is not None else set()
+            ))
+            self.async_set_optimistic_values(device['id'], commanded)
+        errors = await self.command_queue.async_put_states([
+            (device['connection'], commands) for device, commands in batch
+        ])
+        for (device, _), snapshot, error in zip(batch, snapshots, errors):
+            if error is not None:
+                self._async_revert_failed_values(device['id'], *snapshot)
+        for error in errors:
+            if error is not None:
+                raise error
+
+    @callback
+    def async_set_optimistic_values(self, device_id: str, values: Dict[str, str]) -> None:
+        """
+        Applies commanded values before the shadow reports them.
+        They are confirmed or overridden by the next shadow version, or reverted after `OPTIMISTIC_TIMEOUT`.
+        """
+        device = self.devices.get(device_id)
+        if device is None or device['values'] is None or not values:
+            return
+
+        if device['pending'] is None:
+            device['pending'] = PendingState(values={}, version=device['connection']['version'])
+        else:
+            device['pending']['version'] = device['connection']['version']
+        for key, value in values.items():
+            device['pending']['values'].setdefault(key, device['values'].get(key))
+            device['values'][key] = value
+        device['updated_at'] = time.time_ns()
 
-                    for possible_master_id in self.device_master_ids:
-                        device_id = f'{possible_master_id}.{item["deviceConfigId"]}'
-                        if device_id in self.devices:
-                            self.devices[device_id]['connection']['version'] = item.get('version', 0)
+        self._cancel_pending_timeout(device_id)
+        self.pending_timeouts[device_id] = async_call_later(
+            self.hass, OPTIMISTIC_TIMEOUT, functools.partial(self._async_revert_optimistic_values, device_id)
+        )
+        self.async_update_device_listeners({device_id})
 
-                            values = item.get('function')
-                            if values is None:
-                                self.devices[device_id]['values'] = None
-                            elif self.devices[device_id]['values'] is None:
-                                self.devices[device_id]['values'] = values
-                            else:
-                                self.devices[device_id]['values'].update(values)
+    @callback
+    def _async_revert_optimistic_values(self, device_id: str, _now=None) -> None:
+        self.pending_timeouts.pop(device_id, None)
+        device = self.devices.get(device_id)
+        if device is None or device['pending'] is None:
+            return
+
+        _LOGGER.debug('Optimistic values of %s were not confirmed, reverting', device_id)
+        pending, device['pending'] = device['pending'], None
+        if device['values'] is not None:
+            device['values'].update(pending['values'])
+            device['updated_at'] = time.time_ns()
+            self.async_update_device_listeners({device_id})
 
-                            self.devices[device_id]['updated_at'] = time.time_ns()
+    @callback
+    def _async_revert_failed_values(self,
+                                    device_id: str,
+                                    commanded: Dict[str, str],
+                                    previous: Dict[str, Optional[str]],
+                                    pending_keys: Set[str]) -> None:
+        """
+        Reverts the optimistic values of a failed request.
+        Values of earlier commands still waiting for the shadow to confirm them are kept pending.
+        """
+        device = self.devices.get(device_id)
+        if device is None or device['values'] is None:
+            return
+
+        pending = device['pending']
+        for key, value in commanded.items():
+            if device['values'].get(key) != value or key not in previous:
+                # overridden by a later command or the shadow
+                continue
+            device['values'][key] = previous[key]
+            if pending is not None and key not in pending_keys:
+                pending['values'].pop(key, None)
+        if pending is not None and not pending['values']:
+            device['pending'] = None
+            self._cancel_pending_timeout(device_id)
+        device['updated_at'] = time.time_ns()
+        self.async_update_device_listeners({device_id})
+
+    def _cancel_pending_timeout(self, device_id: str) -> None:
+        cancel = self.pending_timeouts.pop(device_id, None)
+        if cancel is not None:
+            cancel()
+
+    def _apply_state_item(self, device: TantronDevice, item: dict) -> bool:
+        """
+        Merges a shadow state item into the device, returns whether its values or availability have changed.
+        """
+        version = item.get('version', 0)
+        device['connection']['version'] = version
+        changed = not device['verified']
+        if changed:
+            device['verified'] = True
+            device['updated_at'] = time.time_ns()
+
+        values = item.get('function')
+        pending = device['pending']
+        if pending is not None:
+            if values is None:
+                device['pending'] = None
+                self._cancel_pending_timeout(device['id'])
+            elif version <= pending['version']:
+                # state from before the command, keep the optimistic values
+                values = {key: value for key, value in values.items() if key not in pending['values']}
+            else:
+                # the shadow has caught up, its values confirm or override the optimistic ones
+                for key in values:
+                    pending['values'].pop(key, None)
+                if not pending['values']:
+                    device['pending'] = None
+                    self._cancel_pending_timeout(device['id'])
+
+        if values is None:
+            if device['values'] is None:
+                return changed
+            device['values'] = None
+        elif device['values'] is None:
+            device['values'] = values
+        elif all(device['values'].get(key) == value for key, value in values.items()):
+            return changed
+        else:
+            device['values'].update(values)
 
-                self.async_set_updated_data(self.devices)
-                await asyncio.sleep(0.1)
+        device['updated_at'] = time.time_ns()
+        return True
+
+    def _get_subscription_options(self) -> SubscriptionOptions:
+        options = self.config_entry.options
+        return SubscriptionOptions(
+            shard_by=options.get(CONF_SHARD_BY, SHARD_BY_NONE),
+            shard_size=options.get(CONF_SHARD_SIZE, DEFAULT_SHARD_SIZE)
+        )
+
+    @callback
+    def async_update_options(self) -> None:
+        options = self._get_subscription_options()
+        if options != self.subscription_options:
+            self.subscription_options = options
+            if self.subscription_task is not None and not self.subscription_task.done():
+                self._restart_subscription()
+
+    def _build_shards(self, device_ids: Set[str]) -> List[List[str]]:
+        """
+        Splits the devices into shards polled concurrently, grouped by master or area and capped in size.
+        Without sharding, all devices are polled with a single request.
+
+        Every shard holds a connection of the poll pool, so there are at most `POLL_MAX_SHARDS` of them.
+        Beyond that, the smallest shards are merged even if that exceeds the size cap.
+        """
+        shard_by, shard_size = self.subscription_options.shard_by, self.subscription_options.shard_size
+        if shard_by == SHARD_BY_NONE:
+            return [sorted(device_ids)]
+
+        groups: Dict[Optional[str], List[str]] = {}
+        for device_id in sorted(device_ids):
+            device = self.devices[device_id]
+            if shard_by == SHARD_BY_MASTER:
+                key = device['connection']['masterId']
+            elif shard_by == SHARD_BY_AREA:
+                key = device['area_id']
+            else:
+                key = None
+            groups.setdefault(key, []).append(device_id)
+
+        shards = []
+        for group in groups.values():
+            shards.extend(group[i:i + shard_size] for i in range(0, len(group), shard_size))
+        if len(shards) <= POLL_MAX_SHARDS:
+            return shards
+
+        merged: List[List[str]] = [[] for _ in range(POLL_MAX_SHARDS)]
+        for shard in sorted(shards, key=len, reverse=True):
+            min(merged, key=len).extend(shard)
+        return merged
+
+    async def _async_subscribe_data(self):
+        try:
+            # devices without listeners have no enabled entities, leaving them out keeps the poll small
+            self.subscribed_ids = {device_id for device_id in self.devices if device_id in self.device_listeners}
+            while not self.subscribed_ids:
+                await asyncio.sleep(POLL_DELAY_IDLE)
+                self.subscribed_ids = {device_id for device_id in self.devices if device_id in self.device_listeners}
+
+            self.subscription_shards = self._build_shards(self.subscribed_ids)
+            self.subscription_transports = [None] * len(self.subscription_shards)
+            if len(self.subscription_shards) > 1:
+                _LOGGER.debug('Polling %d devices in %d shards', len(self.subscribed_ids), len(self.subscription_shards))
+            await asyncio.gather(*(
+                self._async_subscribe_shard(index, shard) for index, shard in enumerate(self.subscription_shards)
+            ))
+
+        except asyncio.CancelledError:
+            return
+
+    async def _async_subscribe_shard(self, index: int, device_ids: List[str]):
+        """
+        Receives the state of a shard through its transport, the long poll of the shadow being the only one available.
+        """
+        transport = LongPollTransport(self, device_ids)
+        self.subscription_transports[index] = transport.name
+        await transport.async_run()
+
+    @callback
+    def async_handle_state_items(self, items: List[dict]) -> bool:
+        """
+        Merges state items from the shadow into the devices, returns whether any device has changed.
+        """
+        changed: Set[str] = set()
+        for item in items:
+            if not item.get('deviceConfigId'):
+                continue
 
-            except asyncio.CancelledError:
-                return
+            device = self._resolve_state_item(item)
+            if device is not None and self._apply_state_item(device, item):
+                changed.add(device['id'])
 
-            except:
-                _LOGGER.warning('Tantron data subscription interrupted, retrying in 5 seconds', exc_info=True)
-                await asyncio.sleep(5)
+        # only wake up entities of changed devices instead of broadcasting to all coordinator listeners
+        self.async_update_device_listeners(changed)
+        if changed:
+            self._schedule_cache_save()
+        return bool(changed)
 
 
 class TantronDeviceEntity(CoordinatorEntity[TantronCoordinator]):
 
     _attr_has_entity_name = True
+    _state_type: Type[TantronState] = TantronState
 
     def __init__(self, coordinator: TantronCoordinator, device: TantronDevice, function_name: Optional[str] = None):
         # for multi-function entities, set `function_name` to `None`
@@ -180,13 +760,14 @@ class TantronDeviceEntity(CoordinatorEntity[TantronCoordinator]):
         self.function_name = function_name
         self.function_info: Dict[str, dict] = {}
         self.function_state: Optional[str | Dict[str, str]] = None
+        self.parsed_state = self._state_type(None)
         for function in device['functions']:
             if function_name is None or function['type'] == function_name:
                 self.function_info[function['type']] = function
 
     @property
     def available(self) -> bool:
-        return self.device_state['values'] is not None
+        return self.device_state['verified'] and self.device_state['values'] is not None
 
     @property
     def unique_id(self):
@@ -209,6 +790,9 @@ class TantronDeviceEntity(CoordinatorEntity[TantronCoordinator]):
 
     async def async_added_to_hass(self) -> None:
         await super().async_added_to_hass()
+        self.async_on_remove(
+            self.coordinator.async_add_device_listener(self.device_id, self._handle_coordinator_update)
+        )
         self._update_function_state()
 
     @callback
@@ -227,27 +811,102 @@ class TantronDeviceEntity(CoordinatorEntity[TantronCoordinator]):
                 self.function_state = self.device_state['values']
         else:
             self.function_state = None
+        self.parsed_state = self._state_type(self.function_state)
         self.device_updated_at = self.device_state['updated_at']
         _LOGGER.debug('New function state for %s: %s', self.device_id, self.device_state['values'])
 
     async def _send_values(self, values: str | Dict[str, str]):
-        commands = []
         if not isinstance(values, dict) and self.function_name is not None:
             values = {
                 self.function_name: str(values)
             }
-        for key, value in values.items():
-            if not self.function_info.get(key, {}).get('sendList'):
-                continue
-            send_info = self.function_info[key]['sendList'][0]
-            commands.append({
-                'dataType': send_info.get('dataType'),
-                'dataLength': send_info.get('dataLength'),
-                'addr': send_info.get('addr'),
-                'protocolType': send_info.get('protocolType'),
-                'value': value,
-                'sleep': send_info.get('sleep'),
-                'type': key
-            })
-        if commands:
-            await self.coordinator.cloud.put_state(self.device_state['connection'], commands)
+        await self.coordinator.async_send_values({
+            self.device_id: {key: value for key, value in values.items() if key in self.function_info}
+        })
+
+
+class TantronAreaEntity(CoordinatorEntity[TantronCoordinator]):
+    """
+    Groups the devices of some types in an area, so that the whole area is controlled with one batch of commands.
+    Area entities are disabled by default, enable them in the entity settings to use them.
+    """
+
+    _attr_has_entity_name = True
+    _attr_entity_registry_enabled_default = False
+    _device_types: Tuple[str, ...] = ()
+    _function_name: Optional[str] = None  # the function whose value is parsed, `None` to parse all values
+    _state_type: Type[TantronState] = TantronState
+
+    def __init__(self, coordinator: TantronCoordinator, area_id: str):
+        super().__init__(coordinator)
+        self.area_id = area_id
+        self.members: List[TantronDevice] = []
+        self.member_states: List[TantronState] = []
+        self._remove_member_listeners: List[Callable[[], None]] = []
+        self._attr_unique_id = f'{coordinator.gateway["id"]}.area.{area_id}.{self._device_types[0]}'
+        self._attr_translation_placeholders = {'area': coordinator.areas.get(area_id, area_id)}
+        self._update_members()
+
+    @classmethod
+    def has_members(cls, coordinator: TantronCoordinator, area_id: str) -> bool:
+        devices = coordinator.devices_by_area.get(area_id, {}).values()
+        return any(device['type'] in cls._device_types for device in devices)
+
+    @property
+    def available(self) -> bool:
+        return any(device['verified'] and device['values'] is not None for device in self.members)
+
+    @property
+    def available_states(self) -> List[TantronState]:
+        return [
+            state for device, state in zip(self.members, self.member_states)
+            if device['verified'] and device['values'] is not None
+        ]
+
+    async def async_added_to_hass(self) -> None:
+        await super().async_added_to_hass()
+        self._listen_members()
+        self.async_on_remove(self._unlisten_members)
+
+    @callback
+    def _handle_coordinator_update(self):
+        # the device list has been reloaded, members may have been added, removed or moved
+        self._update_members()
+        self._listen_members()
+        self.async_write_ha_state()
+
+    @callback
+    def _handle_member_update(self):
+        self._update_member_states()
+        self.async_write_ha_state()
+
+    def _update_members(self):
+        devices = self.coordinator.devices_by_area.get(self.area_id, {}).values()
+        self.members = [device for device in devices if device['type'] in self._device_types]
+        self._update_member_states()
+
+    def _update_member_states(self):
+        self.member_states = []
+        for device in self.members:
+            values = device['values']
+            if values is not None and self._function_name is not None:
+                values = values.get(self._function_name)
+            self.member_states.append(self._state_type(values))
+
+    def _listen_members(self):
+        self._unlisten_members()
+        self._remove_member_listeners = [
+            self.coordinator.async_add_device_listener(device['id'], self._handle_member_update)
+            for device in self.members
+        ]
+
+    def _unlisten_members(self):
+        for remove_listener in self._remove_member_listeners:
+            remove_listener()
+        self._remove_member_listeners = []
+
+    async def _send_values(self, values: Dict[str, str]):
+        await self.coordinator.async_send_values({
+            device['id']: values for device in self.members
+            if device['verified'] and device['values'] is not None
+        })
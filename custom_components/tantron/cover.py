@@ -5,10 +5,12 @@ from typing import TYPE_CHECKING, Any
 
 from homeassistant.components.cover import CoverEntity, CoverDeviceClass, CoverEntityFeature
 
-from .coordinator import TantronDeviceEntity
+from .coordinator import TantronAreaEntity, TantronDeviceEntity
+from .registry import DeviceTypeSpec, async_setup_device_entities
+from .state import TantronState, parse_switch
 
 if TYPE_CHECKING:
-    from typing import Optional
+    from typing import Dict, List, Optional
     from homeassistant.core import HomeAssistant
     from homeassistant.config_entries import ConfigEntry
     from homeassistant.helpers.entity_platform import AddEntitiesCallback
@@ -18,30 +20,63 @@ if TYPE_CHECKING:
 _LOGGER = logging.getLogger(__name__)
 
 
+class CurtainState(TantronState):
+    __slots__ = ('is_closed',)
+
+    def __init__(self, values: Optional[Dict[str, str]]):
+        super().__init__(values)
+        self.is_closed = parse_switch(values.get('switch')) if values is not None else None
+
+
 async def async_setup_entry(hass: HomeAssistant,
                             entry: ConfigEntry[EntryRuntimeData],
                             async_add_entities: AddEntitiesCallback):
-    coordinator = entry.runtime_data['coordinator']
-    entities = []
-    for device_id, device in coordinator.devices.items():
-        if device['type'] == 'curtain':
-            entities.append(TantronCurtain(coordinator, device))
-    async_add_entities(entities)
+    async_setup_device_entities(entry, async_add_entities, DEVICE_TYPES, area_entities=[TantronAreaCurtain])
 
 
 class TantronCurtain(TantronDeviceEntity, CoverEntity):
 
     _attr_device_class = CoverDeviceClass.CURTAIN
     _attr_supported_features = CoverEntityFeature.OPEN | CoverEntityFeature.CLOSE | CoverEntityFeature.STOP
+    _state_type = CurtainState
+    parsed_state: CurtainState
 
     def __init__(self, coordinator: TantronCoordinator, device: TantronDevice):
         super().__init__(coordinator, device)
 
     @property
     def is_closed(self) -> Optional[bool]:
-        if self.function_state is not None and 'switch' in self.function_state:
-            return self.function_state['switch'] == '1'
-        return None
+        return self.parsed_state.is_closed
+
+    async def async_close_cover(self, **kwargs: Any) -> None:
+        await self._send_values({
+            'switch': '1'
+        })
+
+    async def async_open_cover(self, **kwargs: Any) -> None:
+        await self._send_values({
+            'switch': '0'
+        })
+
+    async def async_stop_cover(self, **kwargs: Any) -> None:
+        await self._send_values({
+            'stop': '1'
+        })
+
+
+class TantronAreaCurtain(TantronAreaEntity, CoverEntity):
+
+    _attr_device_class = CoverDeviceClass.CURTAIN
+    _attr_supported_features = CoverEntityFeature.OPEN | CoverEntityFeature.CLOSE | CoverEntityFeature.STOP
+    _attr_translation_key = 'area_curtain'
+    _device_types = ('curtain',)
+    _state_type = CurtainState
+    member_states: List[CurtainState]
+
+    @property
+    def is_closed(self) -> Optional[bool]:
+        states = [state.is_closed for state in self.available_states if state.is_closed is not None]
+        return all(states) if states else None
 
     async def async_close_cover(self, **kwargs: Any) -> None:
         await self._send_values({
@@ -57,3 +92,8 @@ class TantronCurtain(TantronDeviceEntity, CoverEntity):
         await self._send_values({
             'stop': '1'
         })
+
+
+DEVICE_TYPES = [
+    DeviceTypeSpec('curtain', TantronCurtain)
+]
@@ -23,7 +23,11 @@ TO_REDACT = [
 async def async_get_config_entry_diagnostics(hass: HomeAssistant, entry: ConfigEntry[EntryRuntimeData]) -> dict:
     return {
         "entry_data": async_redact_data(entry.data, TO_REDACT),
-        "devices": async_redact_data(entry.runtime_data['coordinator'].devices, TO_REDACT)
+        "devices": async_redact_data(entry.runtime_data['coordinator'].devices, TO_REDACT),
+        "refresh_timings": entry.runtime_data['coordinator'].refresh_timings,
+        "subscription_shards": [len(shard) for shard in entry.runtime_data['coordinator'].subscription_shards],
+        "subscription_transports": entry.runtime_data['coordinator'].subscription_transports,
+        "cloud_stats": entry.runtime_data['cloud'].stats.as_dict()
     }
 
 
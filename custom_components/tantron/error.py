@@ -22,3 +22,7 @@ class TantronCloudError(HomeAssistantError):
 
 class TantronAuthenticationError(TantronCloudError):
     pass
+
+
+class TantronInvalidCommandError(HomeAssistantError):
+    pass
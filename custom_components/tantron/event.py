@@ -14,6 +14,7 @@ async def handle_put_state(event: Event[dict], cloud: TantronCloud):
     """
     This event handler enables the user to send custom states to the Tantron cloud.
     Event data should be exactly what the put state API expects.
+    To control multiple devices and get the result, use the `tantron.put_state` service instead.
 
     For example,
     to trigger the action to dim the control panel from the scene in the app,
@@ -9,9 +9,11 @@ from homeassistant.util.percentage import ranged_value_to_percentage, percentage
 from homeassistant.util.scaling import int_states_in_range
 
 from .coordinator import TantronDeviceEntity
+from .registry import DeviceTypeSpec, async_setup_device_entities
+from .state import TantronState, parse_int, parse_switch
 
 if TYPE_CHECKING:
-    from typing import Optional
+    from typing import Dict, Optional
     from homeassistant.core import HomeAssistant
     from homeassistant.config_entries import ConfigEntry
     from homeassistant.helpers.entity_platform import AddEntitiesCallback
@@ -20,41 +22,43 @@ if TYPE_CHECKING:
 
 _LOGGER = logging.getLogger(__name__)
 
+AIR_PURIFIER_SPEED_RANGE = (1, 3)
+
+
+class AirPurifierState(TantronState):
+    __slots__ = ('is_on', 'percentage')
+
+    def __init__(self, values: Optional[Dict[str, str]]):
+        super().__init__(values)
+        values = values or {}
+        self.is_on = parse_switch(values.get('switch'))
+        speed = parse_int(values.get('speed'))
+        self.percentage = ranged_value_to_percentage(AIR_PURIFIER_SPEED_RANGE, speed) if speed is not None else None
+
 
 async def async_setup_entry(hass: HomeAssistant,
                             entry: ConfigEntry[EntryRuntimeData],
                             async_add_entities: AddEntitiesCallback):
-    coordinator = entry.runtime_data['coordinator']
-    entities = []
-    for device_id, device in coordinator.devices.items():
-        if device['type'] == 'freshAir':
-            entities.append(TantronAirPurifier(coordinator, device))
-    async_add_entities(entities)
+    async_setup_device_entities(entry, async_add_entities, DEVICE_TYPES)
 
 
 class TantronAirPurifier(TantronDeviceEntity, FanEntity):
 
     _attr_supported_features = FanEntityFeature.TURN_ON | FanEntityFeature.TURN_OFF | FanEntityFeature.SET_SPEED
+    _state_type = AirPurifierState
+    parsed_state: AirPurifierState
 
     def __init__(self, coordinator: TantronCoordinator, device: TantronDevice):
         super().__init__(coordinator, device)
-        self._speed_range = (1, 3)
+        self._speed_range = AIR_PURIFIER_SPEED_RANGE
 
     @property
     def is_on(self) -> Optional[bool]:
-        if self.function_state is not None and 'switch' in self.function_state:
-            return self.function_state['switch'] == '1'
-        return None
+        return self.parsed_state.is_on
 
     @property
     def percentage(self) -> Optional[int]:
-        if self.function_state is not None and 'speed' in self.function_state:
-            try:
-                current_speed = int(self.function_state['speed'])
-                return ranged_value_to_percentage(self._speed_range, current_speed)
-            except ValueError:
-                pass
-        return None
+        return self.parsed_state.percentage
 
     async def async_turn_on(self, percentage: Optional[int] = None, **kwargs) -> None:
         if percentage is not None:
@@ -80,3 +84,8 @@ class TantronAirPurifier(TantronDeviceEntity, FanEntity):
     @property
     def speed_count(self) -> int:
         return int_states_in_range(self._speed_range)
+
+
+DEVICE_TYPES = [
+    DeviceTypeSpec('freshAir', TantronAirPurifier)
+]
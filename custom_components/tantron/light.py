@@ -5,9 +5,12 @@ from typing import TYPE_CHECKING
 
 from homeassistant.components.light import LightEntity, ColorMode
 
-from .coordinator import TantronDeviceEntity
+from .coordinator import TantronAreaEntity, TantronDeviceEntity
+from .registry import DeviceTypeSpec, async_setup_device_entities
+from .state import SwitchState
 
 if TYPE_CHECKING:
+    from typing import List
     from homeassistant.core import HomeAssistant
     from homeassistant.config_entries import ConfigEntry
     from homeassistant.helpers.entity_platform import AddEntitiesCallback
@@ -20,30 +23,56 @@ _LOGGER = logging.getLogger(__name__)
 async def async_setup_entry(hass: HomeAssistant,
                             entry: ConfigEntry[EntryRuntimeData],
                             async_add_entities: AddEntitiesCallback):
-    coordinator = entry.runtime_data['coordinator']
-    entities = []
-    for device_id, device in coordinator.devices.items():
-        if device['type'] == 'light':
-            entities.append(TantronLight(coordinator, device))
-    async_add_entities(entities)
+    async_setup_device_entities(entry, async_add_entities, DEVICE_TYPES, area_entities=[TantronAreaLight])
 
 
 class TantronLight(TantronDeviceEntity, LightEntity):
 
     _attr_color_mode = ColorMode.ONOFF
     _attr_supported_color_modes = {ColorMode.ONOFF}
+    _state_type = SwitchState
+    parsed_state: SwitchState
 
-    def __init__(self, coordinator: TantronCoordinator, device: TantronDevice):
-        super().__init__(coordinator, device, 'switch')
+    def __init__(self, coordinator: TantronCoordinator, device: TantronDevice, function_name: str = 'switch'):
+        super().__init__(coordinator, device, function_name)
 
     @property
     def is_on(self) -> bool | None:
-        if self.function_state is not None:
-            return self.function_state == '1'
-        return None
+        return self.parsed_state.is_on
 
     async def async_turn_on(self, **kwargs) -> None:
         await self._send_values('1')
 
     async def async_turn_off(self, **kwargs) -> None:
         await self._send_values('0')
+
+
+class TantronAreaLight(TantronAreaEntity, LightEntity):
+
+    _attr_color_mode = ColorMode.ONOFF
+    _attr_supported_color_modes = {ColorMode.ONOFF}
+    _attr_translation_key = 'area_light'
+    _device_types = ('light',)
+    _function_name = 'switch'
+    _state_type = SwitchState
+    member_states: List[SwitchState]
+
+    @property
+    def is_on(self) -> bool | None:
+        states = [state.is_on for state in self.available_states if state.is_on is not None]
+        return any(states) if states else None
+
+    async def async_turn_on(self, **kwargs) -> None:
+        await self._send_values({
+            'switch': '1'
+        })
+
+    async def async_turn_off(self, **kwargs) -> None:
+        await self._send_values({
+            'switch': '0'
+        })
+
+
+DEVICE_TYPES = [
+    DeviceTypeSpec('light', TantronLight, function='switch')
+]
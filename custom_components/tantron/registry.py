@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, NamedTuple
+
+from homeassistant.core import callback
+
+if TYPE_CHECKING:
+    from typing import Callable, Iterable, List, Optional, Set, Tuple, Type
+    from homeassistant.config_entries import ConfigEntry
+    from homeassistant.helpers.entity import Entity
+    from homeassistant.helpers.entity_platform import AddEntitiesCallback
+    from .coordinator import TantronAreaEntity, TantronCoordinator, TantronDevice
+    from .typing import EntryRuntimeData
+
+
+class DeviceTypeSpec(NamedTuple):
+    """
+    Declares which entity is created for a Tantron device type.
+    Each platform lists its specs in `DEVICE_TYPES`, so that supporting a new device type is a single entry.
+    """
+    type: str  # `type` of the device in the device list
+    entity: Callable[..., Entity]  # called with the coordinator, the device and `function` if set
+    function: Optional[str] = None  # the function the entity is bound to, `None` for multi-function entities
+    icon: Optional[str] = None  # only match devices with this icon
+
+    def matches(self, device: TantronDevice) -> bool:
+        return self.icon is None or device['icon'] == self.icon
+
+    def create(self, coordinator: TantronCoordinator, device: TantronDevice) -> Entity:
+        if self.function is not None:
+            return self.entity(coordinator, device, self.function)
+        return self.entity(coordinator, device)
+
+
+def create_device_entities(coordinator: TantronCoordinator,
+                           specs: Iterable[DeviceTypeSpec],
+                           devices: Optional[List[TantronDevice]] = None) -> List[Entity]:
+    """
+    Creates the entities of the given device types,
+    from the coordinator's type index or from the given devices only.
+    """
+    entities = []
+    for spec in specs:
+        if devices is None:
+            candidates = coordinator.devices_by_type.get(spec.type, {}).values()
+        else:
+            candidates = [device for device in devices if device['type'] == spec.type]
+        for device in candidates:
+            if spec.matches(device):
+                entities.append(spec.create(coordinator, device))
+    return entities
+
+
+def create_area_entities(coordinator: TantronCoordinator,
+                         area_entities: Iterable[Type[TantronAreaEntity]],
+                         created: Set[Tuple[str, Type[TantronAreaEntity]]]) -> List[Entity]:
+    """
+    Creates the area entities of every area with member devices, except those already in `created`.
+    """
+    entities = []
+    for entity in area_entities:
+        for area_id in coordinator.devices_by_area:
+            if (area_id, entity) not in created and entity.has_members(coordinator, area_id):
+                created.add((area_id, entity))
+                entities.append(entity(coordinator, area_id))
+    return entities
+
+
+@callback
+def async_setup_device_entities(entry: ConfigEntry[EntryRuntimeData],
+                                async_add_entities: AddEntitiesCallback,
+                                specs: List[DeviceTypeSpec],
+                                entities: Optional[List[Entity]] = None,
+                                area_entities: Iterable[Type[TantronAreaEntity]] = ()) -> None:
+    """
+    Adds the entities of the given device types and the area entities grouping them,
+    and keeps adding them for devices added to the household later on.
+    Removed devices are cleaned up by the coordinator through the device registry.
+    """
+    coordinator = entry.runtime_data['coordinator']
+    created_areas: Set[Tuple[str, Type[TantronAreaEntity]]] = set()
+    entities = ((entities or []) + create_device_entities(coordinator, specs) +
+                create_area_entities(coordinator, area_entities, created_areas))
+    async_add_entities(entities)
+
+    @callback
+    def _async_devices_added(devices: List[TantronDevice]) -> None:
+        new_entities = (create_device_entities(coordinator, specs, devices) +
+                        create_area_entities(coordinator, area_entities, created_areas))
+        if new_entities:
+            async_add_entities(new_entities)
+
+    entry.async_on_unload(coordinator.async_add_devices_added_listener(_async_devices_added))
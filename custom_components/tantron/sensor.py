@@ -1,24 +1,31 @@
 from __future__ import annotations
 
 import logging
+from datetime import timedelta
 from typing import TYPE_CHECKING
 
-from homeassistant.components.sensor import SensorEntity, SensorDeviceClass
-from homeassistant.const import UnitOfTemperature, \
+from homeassistant.components.sensor import SensorEntity, SensorDeviceClass, SensorStateClass
+from homeassistant.const import EntityCategory, UnitOfTemperature, UnitOfTime, \
     PERCENTAGE, CONCENTRATION_MICROGRAMS_PER_CUBIC_METER, CONCENTRATION_PARTS_PER_MILLION
 
 from .coordinator import TantronDeviceEntity
+from .registry import DeviceTypeSpec, async_setup_device_entities
+from .state import TantronState, parse_float
 
 if TYPE_CHECKING:
-    from typing import Optional
+    from typing import Any, Dict, Optional
     from homeassistant.core import HomeAssistant
     from homeassistant.config_entries import ConfigEntry
     from homeassistant.helpers.entity_platform import AddEntitiesCallback
+    from homeassistant.helpers.device_registry import DeviceInfo
     from .coordinator import TantronCoordinator, TantronDevice
+    from .stats import TantronCloudStats
     from .typing import EntryRuntimeData
 
 _LOGGER = logging.getLogger(__name__)
 
+SCAN_INTERVAL = timedelta(minutes=1)  # only used by the cloud statistics sensors
+
 TANTRON_SENSOR_NAME_CLASS_MAP = {
     '温度': SensorDeviceClass.TEMPERATURE,
     '湿度': SensorDeviceClass.HUMIDITY,
@@ -44,34 +51,125 @@ TANTRON_SENSOR_UNIT_MAP = {
 }
 
 
+class EnvSensorState(TantronState):
+    __slots__ = ('value',)
+
+    def __init__(self, values: Optional[str]):
+        super().__init__(values)
+        self.value = parse_float(values)
+
+
 async def async_setup_entry(hass: HomeAssistant,
                             entry: ConfigEntry[EntryRuntimeData],
                             async_add_entities: AddEntitiesCallback):
     coordinator = entry.runtime_data['coordinator']
-    entities = []
-    for device_id, device in coordinator.devices.items():
-        if device['type'] == 'envSensor':
-            entities.append(TantronEnvSensor(coordinator, device))
-    async_add_entities(entities)
+    stats = entry.runtime_data['cloud'].stats
+    entities = [
+        CloudLatencySensor(coordinator, stats),
+        CloudLongPollSensor(coordinator, stats),
+        CloudErrorsSensor(coordinator, stats)
+    ]
+    async_setup_device_entities(entry, async_add_entities, DEVICE_TYPES, entities)
 
 
 class TantronEnvSensor(TantronDeviceEntity, SensorEntity):
 
-    def __init__(self, coordinator: TantronCoordinator, device: TantronDevice):
-        super().__init__(coordinator, device, 'value')
+    _state_type = EnvSensorState
+    parsed_state: EnvSensorState
 
-    @property
-    def device_class(self) -> Optional[SensorDeviceClass]:
+    def __init__(self, coordinator: TantronCoordinator, device: TantronDevice, function_name: str = 'value'):
+        super().__init__(coordinator, device, function_name)
+        self._update_device_class()
+
+    def _update_function_state(self):
+        super()._update_function_state()
+        # name and icon only change on device reloads, but those go through here as well
+        self._update_device_class()
+
+    def _update_device_class(self):
         if self.device_state['name'] in TANTRON_SENSOR_NAME_CLASS_MAP:
-            return TANTRON_SENSOR_NAME_CLASS_MAP[self.device_state['name']]
-        return TANTRON_SENSOR_ICON_CLASS_MAP.get(self.device_state.get('icon', ''))
+            self._attr_device_class = TANTRON_SENSOR_NAME_CLASS_MAP[self.device_state['name']]
+        else:
+            self._attr_device_class = TANTRON_SENSOR_ICON_CLASS_MAP.get(self.device_state.get('icon', ''))
+        self._attr_native_unit_of_measurement = TANTRON_SENSOR_UNIT_MAP.get(self._attr_device_class)
+
+    @property
+    def native_value(self) -> Optional[float]:
+        return self.parsed_state.value
+
+
+class CloudStatsSensor(SensorEntity):
+    _attr_has_entity_name = True
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
+    _stats_key: str
+
+    def __init__(self, coordinator: TantronCoordinator, stats: TantronCloudStats):
+        self.coordinator = coordinator
+        self.stats = stats
+        # scoped by gateway, as every config entry has its own stats
+        self._attr_unique_id = f'{coordinator.gateway["id"]}.cloud.{self._stats_key}'
+
+    @property
+    def device_info(self) -> Optional[DeviceInfo]:
+        return self.coordinator.gateway_info
+
+
+class CloudLatencySensor(CloudStatsSensor):
+    _stats_key = 'latency'
+    _attr_translation_key = 'cloud_latency'
+    _attr_device_class = SensorDeviceClass.DURATION
+    _attr_native_unit_of_measurement = UnitOfTime.SECONDS
+    _attr_suggested_unit_of_measurement = UnitOfTime.MILLISECONDS
+    _attr_state_class = SensorStateClass.MEASUREMENT
 
     @property
-    def native_unit_of_measurement(self) -> Optional[str]:
-        return TANTRON_SENSOR_UNIT_MAP.get(self.device_class)
+    def native_value(self) -> Optional[float]:
+        # the long poll blocks by design, it has its own sensor
+        return self.stats.latency_percentile(0.95, exclude='get_state')
 
     @property
-    def native_value(self):
-        if self.function_state is not None:
-            return float(self.function_state)
-        return None
+    def extra_state_attributes(self) -> Dict[str, Any]:
+        return {
+            endpoint: {
+                key: value
+                for key, value in stats.as_dict().items()
+                if key.startswith('latency_') or key == 'requests'
+            }
+            for endpoint, stats in self.stats.endpoints.items()
+        }
+
+
+class CloudLongPollSensor(CloudStatsSensor):
+    _stats_key = 'long_poll'
+    _attr_translation_key = 'cloud_long_poll'
+    _attr_device_class = SensorDeviceClass.DURATION
+    _attr_native_unit_of_measurement = UnitOfTime.SECONDS
+    _attr_state_class = SensorStateClass.MEASUREMENT
+
+    @property
+    def native_value(self) -> Optional[float]:
+        return self.stats.get('get_state').as_dict()['latency_p50']
+
+
+class CloudErrorsSensor(CloudStatsSensor):
+    _stats_key = 'errors'
+    _attr_translation_key = 'cloud_errors'
+    _attr_state_class = SensorStateClass.TOTAL_INCREASING
+
+    @property
+    def native_value(self) -> int:
+        return self.stats.error_count
+
+    @property
+    def extra_state_attributes(self) -> Dict[str, Any]:
+        return {
+            endpoint: dict(stats.errors)
+            for endpoint, stats in self.stats.endpoints.items()
+            if stats.errors
+        }
+
+
+DEVICE_TYPES = [
+    DeviceTypeSpec('envSensor', TantronEnvSensor, function='value')
+]
@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import TYPE_CHECKING, NamedTuple
+
+import voluptuous as vol
+
+from homeassistant.config_entries import ConfigEntryState
+from homeassistant.const import ATTR_DEVICE_ID, ATTR_ENTITY_ID
+from homeassistant.core import SupportsResponse, callback
+from homeassistant.exceptions import HomeAssistantError, ServiceValidationError
+from homeassistant.helpers import config_validation as cv, device_registry as dr, entity_registry as er
+
+from .command import COMMAND_CONCURRENCY
+from .const import DOMAIN, SERVICE_PUT_STATE
+from .error import TantronInvalidCommandError
+
+if TYPE_CHECKING:
+    from typing import Any, Dict, List, Optional, Tuple
+    from homeassistant.core import HomeAssistant, ServiceCall, ServiceResponse
+    from .coordinator import TantronCoordinator, TantronDevice
+
+_LOGGER = logging.getLogger(__name__)
+
+MAX_PARALLEL = 32  # upper bound of concurrent put state requests of a single call
+
+TARGET_SCHEMA = vol.All(
+    vol.Schema({
+        vol.Exclusive(ATTR_DEVICE_ID, 'target'): cv.string,
+        vol.Exclusive(ATTR_ENTITY_ID, 'target'): cv.entity_id,
+        vol.Required('values'): vol.Schema({cv.string: cv.string})
+    }),
+    cv.has_at_least_one_key(ATTR_DEVICE_ID, ATTR_ENTITY_ID)
+)
+
+PUT_STATE_SCHEMA = vol.Schema({
+    vol.Required('targets'): vol.All(cv.ensure_list, [TARGET_SCHEMA]),
+    vol.Optional('parallel', default=COMMAND_CONCURRENCY): vol.All(vol.Coerce(int), vol.Range(min=1, max=MAX_PARALLEL))
+})
+
+
+class TargetPlan(NamedTuple):
+    """
+    Values of a single service target, resolved and validated before anything is sent.
+    """
+    index: int  # position in the `targets` of the call
+    coordinator: TantronCoordinator
+    device: TantronDevice
+    values: Dict[str, str]  # function type -> value
+
+
+def _resolve_device(hass: HomeAssistant, target: Dict[str, Any]) -> Tuple[TantronCoordinator, TantronDevice]:
+    device_id = target.get(ATTR_DEVICE_ID)
+    if ATTR_ENTITY_ID in target:
+        entity = er.async_get(hass).async_get(target[ATTR_ENTITY_ID])
+        if entity is None or entity.platform != DOMAIN or entity.device_id is None:
+            raise ServiceValidationError(f'{target[ATTR_ENTITY_ID]} is not a Tantron device entity')
+        device_id = entity.device_id
+
+    device_entry = dr.async_get(hass).async_get(device_id)
+    if device_entry is not None:
+        identifiers = [identifier for domain, identifier in device_entry.identifiers if domain == DOMAIN]
+        for entry_id in device_entry.config_entries:
+            entry = hass.config_entries.async_get_entry(entry_id)
+            if entry is None or entry.domain != DOMAIN or entry.state is not ConfigEntryState.LOADED:
+                continue
+            coordinator: TantronCoordinator = entry.runtime_data['coordinator']
+            for identifier in identifiers:
+                if identifier in coordinator.devices:
+                    return coordinator, coordinator.devices[identifier]
+    raise ServiceValidationError(f'{device_id} is not a loaded Tantron device')
+
+
+def _plan_target(hass: HomeAssistant, index: int, target: Dict[str, Any]) -> TargetPlan:
+    coordinator, device = _resolve_device(hass, target)
+    for key, value in target['values'].items():
+        template = device['commands'].get(key)
+        if template is None:
+            raise ServiceValidationError(f'{device["name"]} has no controllable function {key}')
+        try:
+            template.build(value)
+        except TantronInvalidCommandError as e:
+            raise ServiceValidationError(f'{device["name"]}: {e}') from e
+    return TargetPlan(index=index, coordinator=coordinator, device=device, values=dict(target['values']))
+
+
+async def _async_run_target(plan: TargetPlan, semaphore: asyncio.Semaphore) -> Dict[str, Any]:
+    started_at = time.monotonic()
+    try:
+        # through the command queue like entity commands, so that values are applied optimistically and merged
+        async with semaphore:
+            await plan.coordinator.async_send_values({plan.device['id']: plan.values})
+    except Exception as e:
+        _LOGGER.debug('Failed to put state of %s', plan.device['id'], exc_info=True)
+        return {'success': False, 'latency': time.monotonic() - started_at, 'error': str(e)}
+    return {'success': True, 'latency': time.monotonic() - started_at, 'error': None}
+
+
+async def async_put_state(call: ServiceCall) -> ServiceResponse:
+    """
+    Sends values to multiple devices with a single call.
+
+    Targets of different devices run concurrently, bounded by `parallel` requests at a time.
+    Targets of the same device run in the order given.
+    The `sleep` of a command, in milliseconds, is sent with it and applied by the gateway, not waited for here.
+    """
+    hass = call.hass
+    targets: List[Dict[str, Any]] = call.data['targets']
+    plans = [_plan_target(hass, index, target) for index, target in enumerate(targets)]
+
+    by_device: Dict[str, List[TargetPlan]] = {}
+    for plan in plans:
+        by_device.setdefault(plan.device['id'], []).append(plan)
+
+    semaphore = asyncio.Semaphore(call.data['parallel'])
+    results: List[Optional[Dict[str, Any]]] = [None] * len(plans)
+
+    async def _async_run_device(device_plans: List[TargetPlan]):
+        for device_plan in device_plans:
+            results[device_plan.index] = await _async_run_target(device_plan, semaphore)
+
+    await asyncio.gather(*(_async_run_device(device_plans) for device_plans in by_device.values()))
+
+    for plan, target, result in zip(plans, targets, results):
+        result['device'] = plan.device['id']
+        for key in (ATTR_DEVICE_ID, ATTR_ENTITY_ID):
+            if key in target:
+                result[key] = target[key]
+
+    if call.return_response:
+        return {'results': results}
+    failed = [result['device'] for result in results if not result['success']]
+    if failed:
+        raise HomeAssistantError(f'failed to put state of {len(failed)} of {len(results)} targets: {failed}')
+    return None
+
+
+@callback
+def async_setup_services(hass: HomeAssistant) -> None:
+    hass.services.async_register(DOMAIN, SERVICE_PUT_STATE, async_put_state, schema=PUT_STATE_SCHEMA,
+                                 supports_response=SupportsResponse.OPTIONAL)
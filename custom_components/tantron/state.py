@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from typing import Dict, Optional
+
+
+def parse_float(value: Optional[str]) -> Optional[float]:
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+def parse_int(value: Optional[str]) -> Optional[int]:
+    if value is None:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        return None
+
+
+def parse_switch(value: Optional[str]) -> Optional[bool]:
+    if value is None:
+        return None
+    return value == '1'
+
+
+class TantronState:
+    """
+    Typed state of an entity, parsed from the raw function values once per change,
+    so that entity properties are plain attribute reads.
+
+    Subclasses declare their fields in `__slots__` and parse them in `__init__`.
+    They are constructed with `None` while the device is unavailable, which leaves every field `None`.
+    """
+
+    __slots__ = ()
+
+    def __init__(self, values: Optional[str | Dict[str, str]]):
+        pass
+
+
+class SwitchState(TantronState):
+    """
+    State of single-function entities that are either on or off.
+    """
+
+    __slots__ = ('is_on',)
+
+    def __init__(self, values: Optional[str]):
+        super().__init__(values)
+        self.is_on = parse_switch(values)
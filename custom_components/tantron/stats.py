@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import functools
+import time
+from collections import Counter, deque
+from contextvars import ContextVar
+from typing import TYPE_CHECKING
+
+from httpx import HTTPError
+
+from .error import TantronCloudError, TantronConnectionError
+
+if TYPE_CHECKING:
+    from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, TypeVar
+    from httpx import Response
+
+    T = TypeVar('T')
+
+SAMPLE_SIZE = 500  # latencies kept per endpoint for percentiles
+
+current_endpoint: ContextVar[Optional[str]] = ContextVar('tantron_current_endpoint', default=None)
+
+
+def percentile(samples: List[float], q: float) -> Optional[float]:
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[min(int(len(ordered) * q), len(ordered) - 1)]
+
+
+class EndpointStats:
+
+    def __init__(self):
+        self.requests = 0
+        self.latencies: Deque[float] = deque(maxlen=SAMPLE_SIZE)
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.errors: Counter[str] = Counter()
+
+    def as_dict(self) -> Dict[str, Any]:
+        samples = list(self.latencies)
+        return {
+            'requests': self.requests,
+            'latency_p50': percentile(samples, 0.5),
+            'latency_p95': percentile(samples, 0.95),
+            'latency_p99': percentile(samples, 0.99),
+            'bytes_sent': self.bytes_sent,
+            'bytes_received': self.bytes_received,
+            'errors': dict(self.errors)
+        }
+
+
+class TantronCloudStats:
+    """
+    Latency, traffic and error statistics of the cloud endpoints.
+    Latencies of `get_state` are the durations the shadow poll has blocked.
+    """
+
+    def __init__(self):
+        self.endpoints: Dict[str, EndpointStats] = {}
+
+    def get(self, endpoint: str) -> EndpointStats:
+        if endpoint not in self.endpoints:
+            self.endpoints[endpoint] = EndpointStats()
+        return self.endpoints[endpoint]
+
+    def record_response(self, response: Response):
+        endpoint = current_endpoint.get()
+        if endpoint is None:
+            return
+        stats = self.get(endpoint)
+        stats.bytes_sent += len(response.request.content)
+        stats.bytes_received += len(response.content)
+
+    def latency_percentile(self, q: float, exclude: Optional[str] = None) -> Optional[float]:
+        samples = []
+        for endpoint, stats in self.endpoints.items():
+            if endpoint != exclude:
+                samples.extend(stats.latencies)
+        return percentile(samples, q)
+
+    @property
+    def error_count(self) -> int:
+        return sum(sum(stats.errors.values()) for stats in self.endpoints.values())
+
+    def as_dict(self) -> Dict[str, Dict[str, Any]]:
+        return {endpoint: stats.as_dict() for endpoint, stats in self.endpoints.items()}
+
+
+def instrumented(endpoint: str):
+    """
+    Records latency and errors of a `TantronCloud` endpoint into its `stats`.
+    """
+
+    def decorator(func: Callable[..., Awaitable[T]]) -> Callable[..., Awaitable[T]]:
+        @functools.wraps(func)
+        async def wrapper(self, *args, **kwargs) -> T:
+            stats = self.stats.get(endpoint)
+            token = current_endpoint.set(endpoint)
+            started_at = time.monotonic()
+            try:
+                return await func(self, *args, **kwargs)
+            except TantronCloudError as e:
+                stats.errors[str(e.code)] += 1
+                raise
+            except Exception as e:
+                if isinstance(e, (TantronConnectionError, HTTPError)):
+                    stats.errors['connection'] += 1
+                else:
+                    stats.errors[type(e).__name__] += 1
+                raise
+            finally:
+                stats.requests += 1
+                stats.latencies.append(time.monotonic() - started_at)
+                current_endpoint.reset(token)
+
+        return wrapper
+
+    return decorator
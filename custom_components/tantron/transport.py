@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import abc
+import asyncio
+import logging
+import random
+import time
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from typing import List, Optional
+    from .coordinator import TantronCoordinator
+
+_LOGGER = logging.getLogger(__name__)
+
+POLL_DELAY_MIN = 0.1  # seconds between polls while devices are changing or the shadow is blocking
+POLL_DELAY_IDLE = 1.0  # upper bound between polls when the shadow returns immediately without changes
+POLL_DELAY_OFFLINE = 30.0  # seconds between polls while the gateway reports offline
+POLL_BLOCKING_THRESHOLD = 1.0  # a poll taking longer than this is considered blocked by the shadow service
+RETRY_DELAY_MIN = 1.0
+RETRY_DELAY_MAX = 300.0
+
+TRANSPORT_POLL = 'poll'
+
+
+class SubscriptionScheduler:
+    """
+    Decides how long to wait between shadow polls.
+
+    The shadow service holds the request until something changes or its own timeout passes,
+    in which case polling again right away is cheap. When it returns immediately without changes,
+    the delay grows towards `POLL_DELAY_IDLE` so that idle households are not hammered.
+    """
+
+    def __init__(self):
+        self.delay = POLL_DELAY_MIN
+        self.failures = 0
+
+    def on_success(self, duration: float, changed: bool, gateway_online: bool) -> float:
+        self.failures = 0
+        if not gateway_online:
+            self.delay = POLL_DELAY_OFFLINE
+        elif changed or duration >= POLL_BLOCKING_THRESHOLD:
+            self.delay = POLL_DELAY_MIN
+        else:
+            self.delay = min(max(self.delay, POLL_DELAY_MIN) * 1.5, POLL_DELAY_IDLE)
+        return self.delay
+
+    def on_failure(self) -> float:
+        # exponential backoff with equal jitter, the next success resets it
+        self.failures += 1
+        delay = min(RETRY_DELAY_MIN * 2 ** (self.failures - 1), RETRY_DELAY_MAX)
+        return random.uniform(delay / 2, delay)
+
+
+class StateTransport(abc.ABC):
+    """
+    Delivers shadow state of a shard of devices to the coordinator, until cancelled or `until` has passed.
+    """
+
+    name: str
+
+    def __init__(self, coordinator: TantronCoordinator, device_ids: List[str]):
+        self.coordinator = coordinator
+        self.device_ids = device_ids
+
+    @property
+    def connections(self) -> List[dict]:
+        devices = self.coordinator.devices
+        return [devices[device_id]['connection'] for device_id in self.device_ids if device_id in devices]
+
+    @abc.abstractmethod
+    async def async_run(self, until: Optional[float] = None) -> None:
+        pass
+
+
+class LongPollTransport(StateTransport):
+    """
+    Polls the blocking shadow endpoint, which returns once something has changed or its own timeout passes.
+    """
+
+    name = TRANSPORT_POLL
+
+    def __init__(self, coordinator: TantronCoordinator, device_ids: List[str]):
+        super().__init__(coordinator, device_ids)
+        # each shard backs off on its own, so that a failing block does not stall the others
+        self.scheduler = SubscriptionScheduler()
+
+    async def async_run(self, until: Optional[float] = None) -> None:
+        while until is None or time.monotonic() < until:
+            try:
+                if not self.coordinator.gateway_online:
+                    # the gateway is otherwise only refreshed hourly, check whether it is back on the offline cadence
+                    await self.coordinator.async_refresh_gateway()
+                started_at = time.monotonic()
+                items = await self.coordinator.cloud.get_state(self.connections)
+                duration = time.monotonic() - started_at
+                changed = self.coordinator.async_handle_state_items(items)
+                delay = self.scheduler.on_success(duration, changed, self.coordinator.gateway_online)
+
+            except asyncio.CancelledError:
+                raise
+
+            except:
+                delay = self.scheduler.on_failure()
+                _LOGGER.warning('Tantron data subscription interrupted, retrying in %.1f seconds', delay, exc_info=True)
+
+            await asyncio.sleep(delay)
+
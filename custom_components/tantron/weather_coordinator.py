@@ -0,0 +1,321 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from datetime import timedelta
+from typing import TYPE_CHECKING, Dict, TypedDict
+
+from homeassistant.components.weather import Forecast
+from homeassistant.core import callback
+from homeassistant.helpers.storage import Store
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+
+from .condition import CONDITION_MAP, EXCEPTIONAL
+from .const import DOMAIN
+
+if TYPE_CHECKING:
+    from typing import Any, Callable, List, Optional, Set, Tuple
+    from homeassistant.core import HomeAssistant
+    from .cloud import TantronCloud
+
+_LOGGER = logging.getLogger(__name__)
+
+DATA_WEATHER = f'{DOMAIN}_weather'
+STORAGE_KEY = f'{DOMAIN}.weather'
+STORAGE_VERSION = 1
+STORAGE_SAVE_DELAY = 10  # seconds
+
+PERIOD_NOW = 'now'
+PERIOD_HOURLY = '24hour'
+PERIOD_DAILY = '7day'
+
+COORDINATE_PRECISION = 2  # decimal places, matching the grid resolution of the weather provider
+COORDINATES_TTL = 24 * 60 * 60  # seconds before the coordinates of a household are fetched again
+DEFAULT_EXPIRE_TIME = 20 * 60  # seconds, used if the api does not return `expireTime`
+MIN_UPDATE_INTERVAL = timedelta(minutes=1)
+
+
+class WeatherPeriod(TypedDict):
+    data: Any  # parsed data, attributes for `now` and a list of forecasts otherwise
+    expires_at: float  # unix timestamp
+
+
+def parse_now(data: Any) -> Optional[Dict[str, Any]]:
+    if type(data) is not dict or type(data.get('now')) is not dict:
+        return None
+    data = data['now']
+
+    result: Dict[str, Any] = {
+        'native_temperature': float(data['temp']),
+        'condition': CONDITION_MAP.get(data['icon'], EXCEPTIONAL)
+    }
+    if data.get('feelsLike'):
+        result['native_apparent_temperature'] = float(data['feelsLike'])
+    if data.get('wind360'):
+        result['wind_bearing'] = float(data['wind360'])
+    if data.get('windSpeed'):
+        result['native_wind_speed'] = float(data['windSpeed'])
+    if data.get('humidity'):
+        result['humidity'] = float(data['humidity'])
+    if data.get('pressure'):
+        result['native_pressure'] = float(data['pressure'])
+    if data.get('vis'):
+        result['native_visibility'] = float(data['vis'])
+    if data.get('cloud'):
+        result['cloud_coverage'] = int(data['cloud'])
+    if data.get('dew'):
+        result['native_dew_point'] = float(data['dew'])
+    return result
+
+
+def parse_hourly(data: Any) -> Optional[List[Forecast]]:
+    if type(data) is not dict or type(data.get('hourly')) is not list:
+        return None
+
+    result = []
+    for item in data['hourly']:
+        forecast = Forecast(datetime=item['fxTime'])
+        forecast['native_temperature'] = float(item['temp'])
+        forecast['condition'] = CONDITION_MAP.get(item['icon'], EXCEPTIONAL)
+        if item.get('wind360'):
+            forecast['wind_bearing'] = float(item['wind360'])
+        if item.get('windSpeed'):
+            forecast['native_wind_speed'] = float(item['windSpeed'])
+        if item.get('humidity'):
+            forecast['humidity'] = float(item['humidity'])
+        if item.get('precip'):
+            forecast['native_precipitation'] = float(item['precip'])
+        if item.get('pop'):
+            forecast['precipitation_probability'] = int(item['pop'])
+        if item.get('pressure'):
+            forecast['native_pressure'] = float(item['pressure'])
+        if item.get('cloud'):
+            forecast['cloud_coverage'] = int(item['cloud'])
+        if item.get('dew'):
+            forecast['native_dew_point'] = float(item['dew'])
+        result.append(forecast)
+    return result
+
+
+def parse_daily(data: Any) -> Optional[List[Forecast]]:
+    if type(data) is not dict or type(data.get('daily')) is not list:
+        return None
+
+    result = []
+    for item in data['daily']:
+        forecast = Forecast(datetime=item['fxDate'])
+        forecast['native_temperature'] = float(item['tempMax'])
+        forecast['native_templow'] = float(item['tempMin'])
+        forecast['condition'] = CONDITION_MAP.get(item['iconDay'], EXCEPTIONAL)
+        if item.get('wind360Day'):
+            forecast['wind_bearing'] = float(item['wind360Day'])
+        if item.get('windSpeedDay'):
+            forecast['native_wind_speed'] = float(item['windSpeedDay'])
+        if item.get('precip'):
+            forecast['native_precipitation'] = float(item['precip'])
+        if item.get('uvIndex'):
+            forecast['uv_index'] = float(item['uvIndex'])
+        if item.get('humidity'):
+            forecast['humidity'] = float(item['humidity'])
+        if item.get('pressure'):
+            forecast['native_pressure'] = float(item['pressure'])
+        if item.get('cloud'):
+            forecast['cloud_coverage'] = int(item['cloud'])
+        result.append(forecast)
+    return result
+
+
+PARSERS: Dict[str, Callable[[Any], Any]] = {
+    PERIOD_NOW: parse_now,
+    PERIOD_HOURLY: parse_hourly,
+    PERIOD_DAILY: parse_daily
+}
+
+
+class TantronWeatherCoordinator(DataUpdateCoordinator[Dict[str, WeatherPeriod]]):
+    """
+    Weather of a single location, shared by all config entries whose household is there.
+
+    Each period is only fetched after its `expireTime` has passed,
+    forecasts are only fetched once they have been requested.
+    """
+
+    def __init__(self,
+                 hass: HomeAssistant,
+                 manager: TantronWeatherManager,
+                 key: str,
+                 latitude: float,
+                 longitude: float):
+        super().__init__(hass, _LOGGER, config_entry=None, name=f'{DOMAIN}_weather_{key}',
+                         update_interval=timedelta(seconds=DEFAULT_EXPIRE_TIME))
+        self.manager = manager
+        self.key = key
+        self.latitude = latitude
+        self.longitude = longitude
+        self.clouds: List[TantronCloud] = []
+        self.periods: Dict[str, WeatherPeriod] = manager.restore_periods(key)
+        self.requested: Set[str] = {PERIOD_NOW}
+        self.data = self.periods
+        self._fetching: Dict[str, asyncio.Task] = {}
+
+    def get(self, period: str) -> Any:
+        if period in self.periods:
+            return self.periods[period]['data']
+        return None
+
+    async def async_get_forecast(self, period: str) -> Optional[List[Forecast]]:
+        self.requested.add(period)
+        if self._is_expired(period):
+            try:
+                await self._async_fetch(period)
+            except Exception:
+                _LOGGER.warning('Failed to fetch %s weather', period, exc_info=True)
+        return self.get(period)
+
+    def _is_expired(self, period: str) -> bool:
+        return period not in self.periods or self.periods[period]['expires_at'] <= time.time()
+
+    async def _async_update_data(self) -> Dict[str, WeatherPeriod]:
+        # current conditions first, a failing forecast must not keep them from updating
+        if self._is_expired(PERIOD_NOW):
+            try:
+                await self._async_fetch(PERIOD_NOW)
+            except UpdateFailed:
+                raise
+            except Exception as e:
+                raise UpdateFailed(f'failed to fetch {PERIOD_NOW} weather') from e
+
+        # forecasts may be requested while fetching, iterate over a copy
+        for period in list(self.requested):
+            if period != PERIOD_NOW and self._is_expired(period):
+                try:
+                    await self._async_fetch(period)
+                except Exception:
+                    _LOGGER.warning('Failed to fetch %s weather', period, exc_info=True)
+
+        # wake up again once the earliest requested period expires, failed ones are retried after the minimum
+        expires_at = min(self.periods[period]['expires_at'] if period in self.periods else 0
+                         for period in list(self.requested))
+        self.update_interval = max(timedelta(seconds=expires_at - time.time()), MIN_UPDATE_INTERVAL)
+        return self.periods
+
+    async def _async_fetch(self, period: str):
+        # concurrent requests for the same period share a single fetch
+        task = self._fetching.get(period)
+        if task is None:
+            task = self._fetching[period] = self.hass.async_create_task(self._async_fetch_from_cloud(period))
+            task.add_done_callback(lambda _: self._fetching.pop(period, None))
+        await asyncio.shield(task)
+
+    async def _async_fetch_from_cloud(self, period: str):
+        if not self.clouds:
+            raise UpdateFailed('no cloud available to fetch weather')
+        # any of the households at this location can fetch it, fall back to the others on failure
+        for cloud in self.clouds[:-1]:
+            try:
+                data = await cloud.get_weather(period, self.latitude, self.longitude)
+                break
+            except Exception:
+                _LOGGER.debug('Failed to fetch weather with household %s', cloud.household_id, exc_info=True)
+        else:
+            data = await self.clouds[-1].get_weather(period, self.latitude, self.longitude)
+        parsed = PARSERS[period](data)
+        if parsed is None:
+            raise UpdateFailed(f'failed to parse weather data: {data}')
+        self.periods[period] = WeatherPeriod(
+            data=parsed,
+            expires_at=time.time() + int(data.get('expireTime') or DEFAULT_EXPIRE_TIME)
+        )
+        self.manager.async_schedule_save()
+
+
+class TantronWeatherManager:
+    """
+    Holds the weather coordinators of all config entries, keyed by coordinates rounded to the weather grid,
+    and persists household coordinates and parsed weather across restarts.
+    """
+
+    def __init__(self, hass: HomeAssistant):
+        self.hass = hass
+        self.store: Store = Store(hass, STORAGE_VERSION, STORAGE_KEY)
+        self.coordinates: Dict[str, Tuple[float, float]] = {}  # household id -> coordinates
+        self.coordinates_fetched_at: Dict[str, float] = {}  # household id -> unix timestamp
+        self.coordinators: Dict[str, TantronWeatherCoordinator] = {}
+        self._restored: Dict[str, Dict[str, WeatherPeriod]] = {}
+        self._loaded = False
+        self._lock = asyncio.Lock()
+
+    async def async_load(self):
+        async with self._lock:
+            if self._loaded:
+                return
+            data = await self.store.async_load() or {}
+            self.coordinates = {key: tuple(value) for key, value in data.get('coordinates', {}).items()}
+            # coordinates saved before the timestamps were added are fetched again
+            self.coordinates_fetched_at = data.get('coordinates_fetched_at', {})
+            self._restored = data.get('weather', {})
+            self._loaded = True
+
+    def restore_periods(self, key: str) -> Dict[str, WeatherPeriod]:
+        return self._restored.pop(key, {})
+
+    @callback
+    def async_schedule_save(self):
+        self.store.async_delay_save(self._data_to_save, STORAGE_SAVE_DELAY)
+
+    def _data_to_save(self) -> dict:
+        return {
+            'coordinates': self.coordinates,
+            'coordinates_fetched_at': self.coordinates_fetched_at,
+            'weather': {
+                **self._restored,
+                **{key: coordinator.periods for key, coordinator in self.coordinators.items()}
+            }
+        }
+
+    async def async_get_coordinates(self, cloud: TantronCloud) -> Tuple[float, float]:
+        """
+        Returns the coordinates of the household, fetched again after `COORDINATES_TTL` so that a move is picked up.
+        The cached ones are kept while fetching fails.
+        """
+        household_id = cloud.household_id
+        if time.time() - self.coordinates_fetched_at.get(household_id, 0) >= COORDINATES_TTL:
+            try:
+                self.coordinates[household_id] = await cloud.get_household_coordinates()
+                self.coordinates_fetched_at[household_id] = time.time()
+                self.async_schedule_save()
+            except Exception:
+                if household_id not in self.coordinates:
+                    raise
+                _LOGGER.debug('Failed to fetch the coordinates of %s, using the cached ones', household_id,
+                              exc_info=True)
+        return self.coordinates[household_id]
+
+    async def async_acquire(self, cloud: TantronCloud) -> TantronWeatherCoordinator:
+        await self.async_load()
+        latitude, longitude = await self.async_get_coordinates(cloud)
+        # households within the same grid cell get the same weather
+        latitude, longitude = round(latitude, COORDINATE_PRECISION), round(longitude, COORDINATE_PRECISION)
+        key = f'{latitude:.{COORDINATE_PRECISION}f},{longitude:.{COORDINATE_PRECISION}f}'
+        if key not in self.coordinators:
+            self.coordinators[key] = TantronWeatherCoordinator(self.hass, self, key, latitude, longitude)
+        coordinator = self.coordinators[key]
+        coordinator.clouds.append(cloud)
+        return coordinator
+
+    @callback
+    def async_release(self, coordinator: TantronWeatherCoordinator, cloud: TantronCloud):
+        coordinator.clouds.remove(cloud)
+        if not coordinator.clouds and self.coordinators.get(coordinator.key) is coordinator:
+            # keep the data for the next time the location is used
+            del self.coordinators[coordinator.key]
+            self._restored[coordinator.key] = coordinator.periods
+            self.hass.async_create_task(coordinator.async_shutdown())
+
+
+@callback
+def get_weather_manager(hass: HomeAssistant) -> TantronWeatherManager:
+    if DATA_WEATHER not in hass.data:
+        hass.data[DATA_WEATHER] = TantronWeatherManager(hass)
+    return hass.data[DATA_WEATHER]
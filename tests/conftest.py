@@ -0,0 +1,60 @@
+"""
+Fixtures running the integration against the mock Tantron cloud in `bench`.
+
+Requires `pytest-homeassistant-custom-component` (see `bench/requirements.txt`), run from the repository root:
+```shell
+python -m pytest
+```
+"""
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import pytest
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from bench.mock_cloud import HOUSEHOLD_ID, TOKEN, MockTantronCloud
+from custom_components.tantron import cloud as tantron_cloud
+from custom_components.tantron.const import DOMAIN
+
+if TYPE_CHECKING:
+    from typing import AsyncIterator
+    from homeassistant.core import HomeAssistant
+
+
+@pytest.fixture(autouse=True)
+def auto_enable_custom_integrations(enable_custom_integrations):
+    yield
+
+
+@pytest.fixture
+async def mock_cloud(socket_enabled, monkeypatch) -> AsyncIterator[MockTantronCloud]:
+    # the mock is served on a real local port, which the socket guard of the test plugin blocks by default
+    cloud = MockTantronCloud(devices=20, seed=1)
+    monkeypatch.setattr(tantron_cloud, 'BASE_URL', await cloud.start())
+    yield cloud
+    await cloud.stop()
+
+
+@pytest.fixture
+async def config_entry(hass: HomeAssistant, mock_cloud: MockTantronCloud) -> AsyncIterator[MockConfigEntry]:
+    entry = MockConfigEntry(domain=DOMAIN, unique_id=HOUSEHOLD_ID, data={
+        'phone': '10000000000',
+        'password': tantron_cloud.TantronCloud.hash_password('password'),
+        'token': TOKEN,
+        'household': HOUSEHOLD_ID
+    })
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    yield entry
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
+
+
+def find_device(mock_cloud: MockTantronCloud, device_type: str) -> dict:
+    return next(device for device in mock_cloud.devices.values() if device['type'] == device_type)
+
+
+def device_id(device: dict) -> str:
+    return f'{device["masterId"]}.{device["id"]}'
@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import pytest
+
+from bench.mock_cloud import HOUSEHOLD_ID, TOKEN, MockTantronCloud
+from custom_components.tantron import cloud as tantron_cloud
+from custom_components.tantron.cloud import DATA_CLIENTS, TantronCloud
+
+if TYPE_CHECKING:
+    from typing import Optional
+    from homeassistant.core import HomeAssistant
+    from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+
+@pytest.mark.parametrize('max_page_size', [None, 50])
+async def test_device_list_is_paged(hass: HomeAssistant, socket_enabled, monkeypatch, max_page_size: Optional[int]):
+    mock_cloud = MockTantronCloud(devices=450, max_page_size=max_page_size, seed=2)
+    monkeypatch.setattr(tantron_cloud, 'BASE_URL', await mock_cloud.start())
+    try:
+        cloud = TantronCloud(hass, TOKEN, HOUSEHOLD_ID, 'paging')
+        devices = await cloud.get_devices()
+    finally:
+        await mock_cloud.stop()
+
+    assert sorted(device['id'] for device in devices) == sorted(mock_cloud.devices)
+    page_size = min(tantron_cloud.DEVICE_PAGE_SIZE, max_page_size or tantron_cloud.DEVICE_PAGE_SIZE)
+    pages = -(-len(mock_cloud.devices) // page_size)
+    assert mock_cloud.requests['/device-service/normal/device/list'] == pages
+
+
+async def test_clients_are_closed_with_the_last_entry(hass: HomeAssistant, config_entry: MockConfigEntry):
+    account = config_entry.data['phone']
+    clients = hass.data[DATA_CLIENTS][account]
+    assert clients.entry_ids == {config_entry.entry_id}
+
+    assert await hass.config_entries.async_unload(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+    assert account not in hass.data[DATA_CLIENTS]
+    assert clients.control.is_closed
+    assert clients.poll.is_closed
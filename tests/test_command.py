@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from bench.mock_cloud import HOUSEHOLD_ID, TOKEN
+from custom_components.tantron.cloud import TantronCloud
+from custom_components.tantron.command import TantronCommandQueue, compile_command_templates
+from .conftest import find_device
+
+if TYPE_CHECKING:
+    from homeassistant.core import HomeAssistant
+    from bench.mock_cloud import MockTantronCloud
+
+
+def _connection(device: dict, master_id: str = None) -> dict:
+    return {
+        'deviceConfigId': device['id'],
+        'configVersion': device['configVersion'],
+        'masterId': master_id or device['masterId'],
+        'version': 0
+    }
+
+
+async def test_commands_of_a_device_are_merged(hass: HomeAssistant, mock_cloud: MockTantronCloud):
+    queue = TantronCommandQueue(hass, TantronCloud(hass, TOKEN, HOUSEHOLD_ID, 'command'))
+    light = find_device(mock_cloud, 'light')
+    switch = compile_command_templates(light['functionList'])['switch']
+
+    errors = await queue.async_put_states([
+        (_connection(light), [switch.build('1')]),
+        (_connection(light), [switch.build('0')])
+    ])
+
+    assert errors == [None, None]
+    assert len(mock_cloud.put_requests) == 1
+    # the last write wins
+    assert mock_cloud.values[light['id']]['switch'] == '0'
+
+
+async def test_devices_of_different_masters_are_not_merged(hass: HomeAssistant, mock_cloud: MockTantronCloud):
+    queue = TantronCommandQueue(hass, TantronCloud(hass, TOKEN, HOUSEHOLD_ID, 'command'))
+    light = find_device(mock_cloud, 'light')
+    switch = compile_command_templates(light['functionList'])['switch']
+
+    errors = await queue.async_put_states([
+        (_connection(light), [switch.build('1')]),
+        (_connection(light, master_id='other-master'), [switch.build('1')])
+    ])
+
+    assert errors == [None, None]
+    assert sorted(payload['masterId'] for _, payload in mock_cloud.put_requests) == \
+        sorted([light['masterId'], 'other-master'])
@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+from datetime import timedelta
+from typing import TYPE_CHECKING
+
+import pytest
+from homeassistant.helpers import device_registry as dr, entity_registry as er
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import async_fire_time_changed
+
+from custom_components.tantron.const import DOMAIN
+from custom_components.tantron.coordinator import CACHE_SAVE_DELAY, OPTIMISTIC_TIMEOUT, RESUBSCRIBE_DELAY
+from custom_components.tantron.error import TantronCloudError
+from .conftest import device_id, find_device
+
+if TYPE_CHECKING:
+    from homeassistant.core import HomeAssistant
+    from pytest_homeassistant_custom_component.common import MockConfigEntry
+    from bench.mock_cloud import MockTantronCloud
+
+
+async def test_setup_loads_all_devices(config_entry: MockConfigEntry, mock_cloud: MockTantronCloud):
+    coordinator = config_entry.runtime_data['coordinator']
+    assert set(coordinator.devices) == {device_id(device) for device in mock_cloud.devices.values()}
+    assert coordinator.gateway_verified
+
+
+async def test_removed_entities_are_no_longer_polled(hass: HomeAssistant,
+                                                     config_entry: MockConfigEntry,
+                                                     mock_cloud: MockTantronCloud):
+    coordinator = config_entry.runtime_data['coordinator']
+    heater_id = device_id(find_device(mock_cloud, 'heating'))
+    assert heater_id in coordinator.subscribed_ids
+
+    device_entry = dr.async_get(hass).async_get_device(identifiers={(DOMAIN, heater_id)})
+    entity_registry = er.async_get(hass)
+    for entity in er.async_entries_for_device(entity_registry, device_entry.id):
+        entity_registry.async_remove(entity.entity_id)
+    await hass.async_block_till_done()
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=RESUBSCRIBE_DELAY + 1))
+    await hass.async_block_till_done()
+
+    assert heater_id not in coordinator.subscribed_ids
+    assert coordinator.subscribed_ids
+
+
+async def test_merge_devices_adds_removes_and_patches(config_entry: MockConfigEntry, mock_cloud: MockTantronCloud):
+    coordinator = config_entry.runtime_data['coordinator']
+    raw_devices = [dict(device) for device in mock_cloud.devices.values()]
+    removed, renamed = raw_devices.pop(0), raw_devices[0]
+    renamed['name'] = 'Renamed'
+    renamed['configVersion'] += 1
+    added = {**raw_devices[1], 'id': '99999', 'name': 'Added'}
+    raw_devices.append(added)
+    existing = coordinator.devices[device_id(renamed)]
+
+    coordinator._merge_devices(coordinator._build_devices(raw_devices))
+
+    assert device_id(removed) not in coordinator.devices
+    assert device_id(added) in coordinator.devices
+    # patched in place, so that entities keep their reference
+    assert coordinator.devices[device_id(renamed)] is existing
+    assert existing['name'] == 'Renamed'
+
+
+async def test_optimistic_values_are_confirmed(config_entry: MockConfigEntry, mock_cloud: MockTantronCloud):
+    coordinator = config_entry.runtime_data['coordinator']
+    light = find_device(mock_cloud, 'light')
+    device = coordinator.devices[device_id(light)]
+    coordinator.async_set_optimistic_values(device['id'], {'switch': '1'})
+    assert device['values']['switch'] == '1'
+    assert device['pending'] is not None
+
+    coordinator.async_handle_state_items([{
+        'deviceConfigId': light['id'],
+        'masterId': light['masterId'],
+        'version': device['connection']['version'] + 1,
+        'function': {'switch': '1'}
+    }])
+
+    assert device['pending'] is None
+    assert device['values']['switch'] == '1'
+
+
+async def test_optimistic_values_are_reverted(hass: HomeAssistant,
+                                              config_entry: MockConfigEntry,
+                                              mock_cloud: MockTantronCloud):
+    coordinator = config_entry.runtime_data['coordinator']
+    light = find_device(mock_cloud, 'light')
+    device = coordinator.devices[device_id(light)]
+    original = device['values']['switch']
+    coordinator.async_set_optimistic_values(device['id'], {'switch': '1' if original == '0' else '0'})
+
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=OPTIMISTIC_TIMEOUT + 1))
+    await hass.async_block_till_done()
+
+    assert device['pending'] is None
+    assert device['values']['switch'] == original
+
+
+async def test_optimistic_values_are_reverted_on_error(config_entry: MockConfigEntry, mock_cloud: MockTantronCloud):
+    coordinator = config_entry.runtime_data['coordinator']
+    light = find_device(mock_cloud, 'light')
+    device = coordinator.devices[device_id(light)]
+    original = device['values']['switch']
+    # the mock rejects commands to devices it does not know
+    del mock_cloud.devices[light['id']]
+
+    with pytest.raises(TantronCloudError):
+        await coordinator.async_send_values({device['id']: {'switch': '1' if original == '0' else '0'}})
+
+    assert device['pending'] is None
+    assert device['values']['switch'] == original
+
+
+async def test_failed_request_keeps_earlier_optimistic_values(config_entry: MockConfigEntry,
+                                                              mock_cloud: MockTantronCloud):
+    coordinator = config_entry.runtime_data['coordinator']
+    air_conditioner = find_device(mock_cloud, 'AC')
+    device = coordinator.devices[device_id(air_conditioner)]
+    # an earlier command that has been sent and is waiting for the shadow
+    coordinator.async_set_optimistic_values(device['id'], {'switch': '1'})
+    original_mode = device['values']['mode']
+    del mock_cloud.devices[air_conditioner['id']]
+
+    with pytest.raises(TantronCloudError):
+        await coordinator.async_send_values({device['id']: {'mode': '1' if original_mode != '1' else '3'}})
+
+    assert device['values']['mode'] == original_mode
+    assert device['values']['switch'] == '1'
+    assert set(device['pending']['values']) == {'switch'}
+
+
+async def test_cache_is_saved_while_devices_keep_changing(hass: HomeAssistant,
+                                                          hass_storage: dict,
+                                                          config_entry: MockConfigEntry,
+                                                          mock_cloud: MockTantronCloud):
+    coordinator = config_entry.runtime_data['coordinator']
+    light = find_device(mock_cloud, 'light')
+    device = coordinator.devices[device_id(light)]
+    key = f'{DOMAIN}.{config_entry.entry_id}'
+    hass_storage.pop(key, None)
+
+    now = dt_util.utcnow()
+    for step in range(1, 8):
+        coordinator.async_handle_state_items([{
+            'deviceConfigId': light['id'],
+            'masterId': light['masterId'],
+            'version': device['connection']['version'] + 1,
+            'function': {'switch': str(step % 2)}
+        }])
+        async_fire_time_changed(hass, now + timedelta(seconds=step * CACHE_SAVE_DELAY / 4))
+        await hass.async_block_till_done()
+    async_fire_time_changed(hass, now + timedelta(seconds=2 * CACHE_SAVE_DELAY + 1))
+    await hass.async_block_till_done()
+
+    assert key in hass_storage
@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from homeassistant.helpers import device_registry as dr
+
+from custom_components.tantron.const import DOMAIN, SERVICE_PUT_STATE
+from .conftest import device_id
+
+if TYPE_CHECKING:
+    from homeassistant.core import HomeAssistant
+    from pytest_homeassistant_custom_component.common import MockConfigEntry
+    from bench.mock_cloud import MockTantronCloud
+
+
+async def test_put_state_goes_through_the_command_queue(hass: HomeAssistant,
+                                                        config_entry: MockConfigEntry,
+                                                        mock_cloud: MockTantronCloud):
+    coordinator = config_entry.runtime_data['coordinator']
+    lights = [device for device in mock_cloud.devices.values() if device['type'] == 'light'][:2]
+    device_registry = dr.async_get(hass)
+    targets = [{
+        'device_id': device_registry.async_get_device(identifiers={(DOMAIN, device_id(light))}).id,
+        'values': {'switch': '1'}
+    } for light in lights]
+
+    response = await hass.services.async_call(DOMAIN, SERVICE_PUT_STATE, {'targets': targets},
+                                              blocking=True, return_response=True)
+
+    assert [result['success'] for result in response['results']] == [True, True]
+    assert sorted(str(payload['deviceConfigId']) for _, payload in mock_cloud.put_requests) == \
+        sorted(light['id'] for light in lights)
+    for light in lights:
+        assert mock_cloud.values[light['id']]['switch'] == '1'
+        assert coordinator.devices[device_id(light)]['values']['switch'] == '1'
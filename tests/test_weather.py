@@ -0,0 +1,25 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from bench.mock_cloud import HOUSEHOLD_ID, TOKEN
+from custom_components.tantron.cloud import TantronCloud
+from custom_components.tantron.weather_coordinator import COORDINATES_TTL, TantronWeatherManager
+
+if TYPE_CHECKING:
+    from homeassistant.core import HomeAssistant
+    from bench.mock_cloud import MockTantronCloud
+
+
+async def test_household_coordinates_expire(hass: HomeAssistant, mock_cloud: MockTantronCloud):
+    manager = TantronWeatherManager(hass)
+    await manager.async_load()
+    cloud = TantronCloud(hass, TOKEN, HOUSEHOLD_ID, 'weather')
+    assert await manager.async_get_coordinates(cloud) == (39.90, 116.40)
+
+    # the household has moved, the cached coordinates are used until they expire
+    mock_cloud.coordinates = (31.23, 121.47)
+    assert await manager.async_get_coordinates(cloud) == (39.90, 116.40)
+
+    manager.coordinates_fetched_at[HOUSEHOLD_ID] -= COORDINATES_TTL
+    assert await manager.async_get_coordinates(cloud) == (31.23, 121.47)